@@ -0,0 +1,118 @@
+"""Grade-distribution and what-if analytics over a whole roster.
+
+A roster is loaded once into per-column NumPy arrays. For each term and weight
+setting the exam-independent part of the grade is precomputed, so a what-if
+(curve the exam, override the weights) is one clip, one multiply-add, one
+band lookup and one bincount over the section:
+
+    grade = fixed + k * clip(exam + curve, 0, 100)
+    fixed = partial_w*cs_w*cs + prior_w*prior,   k = partial_w*exam_w
+
+(Prelim uses partial_w = 1 and no prior.) Prior-term grades are graded once
+with the base policy when the roster is loaded. Students with a blank input
+for the term have no grade; they are counted as ``missing`` and left out of
+the band counts, pass rate and mean rather than counted as failing.
+"""
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+import roster
+from grading import POLICY, band_index
+
+_FIXED_CACHE_SIZE = 32
+
+
+class WhatIf(NamedTuple):
+    grades:      np.ndarray     # NaN where an input is blank
+    bands:       np.ndarray     # band index per student
+    counts:      np.ndarray     # graded students per band, failing band first
+    pass_rate:   float          # over graded students
+    mean:        float          # over graded students
+    transitions: np.ndarray     # [baseline band, what-if band] graded-student counts
+    missing:     int            # students with a blank input for the term
+
+
+class RosterModel:
+    def __init__(self, columns, policy=None):
+        self.columns = columns
+        self.policy  = policy or POLICY
+        self.rows    = len(next(iter(columns.values()))) if columns else 0
+        self.terms   = [t for t, (cs, exam, prior) in roster.TERMS.items()
+                        if cs in columns and exam in columns and (prior is None or f"{prior}_grade" in columns)]
+        self._fixed    = OrderedDict()
+        self._baseline = {}
+
+    def inputs(self, term):
+        cs_col, exam_col, prior = roster.TERMS[term]
+        prior_grades = None if prior is None else self.columns[f"{prior}_grade"]
+        return self.columns[cs_col], self.columns[exam_col], prior_grades
+
+    def _fixed_part(self, term, cs_w, partial_w):
+        """Exam-independent part of the grade and the exam coefficient, memoized."""
+        key = (term, cs_w, partial_w)
+        if key not in self._fixed:
+            cs, _, prior = self.inputs(term)
+            if prior is None:
+                fixed, k = cs_w * cs, 1 - cs_w
+            else:
+                fixed, k = partial_w * cs_w * cs + (1 - partial_w) * prior, partial_w * (1 - cs_w)
+            self._fixed[key] = (fixed, k)
+            if len(self._fixed) > _FIXED_CACHE_SIZE:
+                self._fixed.popitem(last=False)
+        self._fixed.move_to_end(key)
+        return self._fixed[key]
+
+    def grades(self, term, curve=0.0, cs_w=None, partial_w=None, cap=True):
+        cs_w      = self.policy.cs_w if cs_w is None else cs_w
+        partial_w = self.policy.partial_w if partial_w is None else partial_w
+        fixed, k  = self._fixed_part(term, cs_w, partial_w)
+        _, exam, _ = self.inputs(term)
+        exam = exam + curve
+        if cap:
+            np.clip(exam, 0.0, 100.0, out=exam)
+        return fixed + k * exam
+
+    def baseline(self, term):
+        if term not in self._baseline:
+            self._baseline[term] = band_index(self.grades(term), self.policy)
+        return self._baseline[term]
+
+    def what_if(self, term, curve=0.0, cs_w=None, partial_w=None, cap=True):
+        grades = self.grades(term, curve, cs_w, partial_w, cap)
+        bands  = band_index(grades, self.policy)
+        graded = ~np.isnan(grades)
+        n      = int(graded.sum())
+        nb     = len(self.policy.points)
+        counts = np.bincount(bands[graded], minlength=nb)
+        moves  = np.bincount(self.baseline(term)[graded] * nb + bands[graded], minlength=nb * nb).reshape(nb, nb)
+        return WhatIf(
+            grades      = grades,
+            bands       = bands,
+            counts      = counts,
+            pass_rate   = float((bands[graded] > 0).mean()) if n else 0.0,
+            mean        = float(np.nanmean(grades)) if n else 0.0,
+            transitions = moves,
+            missing     = self.rows - n,
+        )
+
+    def band_moves(self, result):
+        """Off-diagonal transitions as (from_points, to_points, students), largest first."""
+        pts   = self.policy.points
+        moves = [(float(pts[i]), float(pts[j]), int(n))
+                 for (i, j), n in np.ndenumerate(result.transitions) if i != j and n]
+        return sorted(moves, key=lambda m: -m[2])
+
+
+def load_roster(src, fmt="csv", chunksize=roster.DEFAULT_CHUNKSIZE, policy=None):
+    """Stream a roster file into a RosterModel, keeping only the grading columns."""
+    keep  = [c for cs, exam, _ in roster.TERMS.values() for c in (cs, exam)]
+    keep += [f"{t}_grade" for t in roster.TERMS]
+    parts = {}
+    for df in roster.iter_chunks(src, fmt, chunksize):
+        df = roster.grade_chunk(df)
+        for col in keep:
+            if col in df.columns:
+                parts.setdefault(col, []).append(roster.numeric(df, col))
+    return RosterModel({col: np.concatenate(chunks) for col, chunks in parts.items()}, policy)
@@ -0,0 +1,212 @@
+"""Benchmarks for the grading core, page reruns and the chat pipeline.
+
+    python bench.py                          # everything, table on stdout
+    python bench.py --only scalar batch      # pick groups
+    python bench.py --json results.json      # store results for later comparison
+    python bench.py --compare results.json   # show the change against a stored run
+
+Groups:
+  scalar  grading_scheme / resolve_desired / calc_pct per-call cost
+  batch   grade_roster on 1k / 100k / 1M rows
+  exact   fixed-point vs float grade_roster on 1M rows (correctness is
+          covered by test_fixed_point.py)
+  mc      Monte Carlo pass probability: 1M draws for one student, and a
+          100-student section at 100k draws each
+  reports XLSX section workbook and zipped PDF grade sheets for a 10k-student
+          roster (skipped when openpyxl / reportlab are missing)
+  rerun   full headless rerun of each mode through Streamlit's AppTest
+  chat    chat turns against the local fake streaming server (fake_llm.py)
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from grading import calc_pct, grade_roster, grading_scheme, resolve_desired
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grade_calcu.py")
+
+
+def measure(fn, repeat=5, number=1):
+    """Run fn ``number`` times per sample, ``repeat`` samples; seconds per call."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return {"min": min(samples), "median": statistics.median(samples), "mean": statistics.fmean(samples),
+            "repeat": repeat, "number": number}
+
+
+# ── Groups ─────────────────────────────────────────────────────────────────────
+def bench_scalar():
+    pcts = np.random.default_rng(0).uniform(60, 100, 1000).tolist()
+    n    = len(pcts)
+    return {
+        "scalar.grading_scheme":  measure(lambda: [grading_scheme(p) for p in pcts], number=5) | {"items": n},
+        "scalar.resolve_desired": measure(lambda: [resolve_desired(p / 20) for p in pcts], number=5) | {"items": n},
+        "scalar.calc_pct":        measure(lambda: [calc_pct(p, 100) for p in pcts], number=5) | {"items": n},
+    }
+
+
+def bench_batch(sizes=(1_000, 100_000, 1_000_000)):
+    results = {}
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        cs, exam, prior = rng.uniform(50, 100, (3, n))
+        results[f"batch.grade_roster.{n}"] = measure(lambda: grade_roster(cs, exam, prior)) | {"items": n}
+    return results
+
+
+def bench_exact(n=1_000_000):
+    rng = np.random.default_rng(0)
+    cs, exam, prior = np.round(rng.uniform(50, 100, (3, n)), 2)
+    return {
+        f"exact.float.{n}":       measure(lambda: grade_roster(cs, exam, prior, exact=False)) | {"items": n},
+        f"exact.fixed_point.{n}": measure(lambda: grade_roster(cs, exam, prior, exact=True)) | {"items": n},
+    }
+
+
+def bench_mc(draws=1_000_000, section=100):
+    import montecarlo
+
+    early = montecarlo.student_inputs({"prelim_cs": 85, "prelim_exam": 78})   # four inputs unknown
+    late  = montecarlo.student_inputs({"prelim_cs": 85, "prelim_exam": 78, "midterm_cs": 88,
+                                       "midterm_exam": 82, "final_cs": 90})  # final exam unknown
+    rng      = np.random.default_rng(0)
+    students = [montecarlo.student_inputs({"prelim_cs": cs, "prelim_exam": ex})
+                for cs, ex in rng.uniform(60, 100, (section, 2))]
+    return {
+        f"mc.student.4_unknown.{draws}": measure(lambda: montecarlo.simulate(early, draws, 0)) | {"items": draws},
+        f"mc.student.1_unknown.{draws}": measure(lambda: montecarlo.simulate(late, draws, 0)) | {"items": draws},
+        f"mc.section.{section}x100000":  measure(lambda: montecarlo.simulate_section(students, 100_000, 0), repeat=3)
+                                         | {"items": section * 100_000},
+    }
+
+
+def bench_reports(n=10_000):
+    import tempfile
+
+    import pandas as pd
+    import reports
+
+    rng = np.random.default_rng(0)
+    df  = pd.DataFrame({"student_id": [f"S{i:05d}" for i in range(n)]}
+                       | {c: np.round(rng.uniform(55, 100, n), 2) for c in ("prelim_cs", "prelim_exam", "midterm_cs",
+                                                                            "midterm_exam", "final_cs", "final_exam")})
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-reports-") as tmp:
+        src = os.path.join(tmp, "roster.csv")
+        df.to_csv(src, index=False)
+        for kind, ok in (("xlsx", reports.xlsx_available()), ("pdf", reports.pdf_available())):
+            if ok:
+                dst = os.path.join(tmp, f"out.{kind}")
+                results[f"reports.{kind}.{n}"] = measure(lambda: reports.export(kind, src, dst), repeat=3) \
+                                                 | {"items": n, "bytes": os.path.getsize(dst)}
+    return results
+
+
+def bench_rerun():
+    from streamlit.testing.v1 import AppTest
+
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    results = {}
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    for mode in ("Predict Exam Score", "Calculate Grade", "Class Standing"):
+        if mode != "Predict Exam Score":
+            at.button(key=f"nav_{mode}").click().run()
+        results[f"rerun.{mode}"] = measure(at.run, repeat=10)
+    return results
+
+
+def bench_chat(turns=20):
+    import fake_llm
+    from chat_backend import AssistantBackend
+    from chat_stream import render_stream
+
+    class Placeholder:
+        renders = 0
+
+        def markdown(self, _):
+            Placeholder.renders += 1
+
+    server  = fake_llm.serve(latency=0)
+    backend = AssistantBackend("bench", base_url=server.base_url)
+    msgs    = [{"role": "user", "content": "what do I need on the final?"}]
+    ttft    = []
+
+    def turn():
+        t0, first = time.perf_counter(), []
+
+        def tokens():
+            for tok in backend.stream(msgs):
+                if not first:
+                    first.append(time.perf_counter() - t0)
+                yield tok
+        render_stream(Placeholder(), tokens())
+        ttft.append(first[0])
+
+    result = measure(turn, repeat=turns)
+    backend.close()
+    server.shutdown()
+    return {"chat.turn": result | {"ttft_median": statistics.median(ttft),
+                                   "renders_per_turn": Placeholder.renders / turns}}
+
+
+GROUPS = {"scalar": bench_scalar, "batch": bench_batch, "exact": bench_exact, "mc": bench_mc, "reports": bench_reports, "rerun": bench_rerun, "chat": bench_chat}
+
+
+# ── Reporting ──────────────────────────────────────────────────────────────────
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(APP)).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit, "python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "numpy": np.__version__, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def report(results, baseline=None):
+    lines = [f"{'benchmark':40} {'median':>12} {'per item':>12} {'vs base':>9}"]
+    for name, r in results.items():
+        per_item = f"{r['median'] / r['items'] * 1e9:9.1f} ns" if "items" in r else ""
+        change = ""
+        if baseline and name in baseline:
+            change = f"{r['median'] / baseline[name]['median']:8.2f}×"
+        lines.append(f"{name:40} {r['median'] * 1000:9.3f} ms {per_item:>12} {change:>9}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(GROUPS), help="benchmark groups to run (default: all)")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or GROUPS:
+        results.update(GROUPS[name]())
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print(report(results, baseline))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Async assistant backend shared by every Streamlit session.
+
+All upstream chat-completions traffic runs on one background asyncio loop over
+a single connection-pooled ``AsyncGroq`` client. Script threads only wait on a
+token queue, so a session that is waiting on the network does not hold the
+upstream connection. Limits:
+
+* at most ``max_concurrency`` upstream streams at once;
+* at most ``max_queue`` requests waiting for a slot (beyond that, BackendBusy);
+* ``timeout`` bounds the wait for a slot and the gap between two tokens.
+
+Admission is decided on the ``active``/``waiting`` counters, which change
+without an await in between, so a burst of simultaneous requests cannot slip
+past the queue bound. Upstream API failures (connection errors, 401, 429, …)
+surface as BackendUnavailable.
+
+Closing the token generator (the user navigated away, Streamlit stopped the
+script) cancels the upstream request.
+"""
+import asyncio
+import os
+import queue
+import threading
+
+import httpx
+from groq import APIError, APIStatusError, AsyncGroq
+
+MODEL               = "llama-3.3-70b-versatile"
+DEFAULT_CONCURRENCY = int(os.environ.get("GRADE_LLM_CONCURRENCY", 16))
+DEFAULT_QUEUE       = int(os.environ.get("GRADE_LLM_QUEUE", 64))
+DEFAULT_TIMEOUT     = float(os.environ.get("GRADE_LLM_TIMEOUT", 60))
+
+_DONE = object()
+
+
+class BackendBusy(RuntimeError):
+    """Raised when the wait queue for upstream slots is full."""
+
+
+class BackendUnavailable(RuntimeError):
+    """Raised when the upstream API fails (connection, auth, rate limit, server error)."""
+
+
+class AssistantBackend:
+    def __init__(self, api_key, base_url=None, max_concurrency=DEFAULT_CONCURRENCY,
+                 max_queue=DEFAULT_QUEUE, timeout=DEFAULT_TIMEOUT, model=MODEL):
+        self.model           = model
+        self.max_concurrency = max_concurrency
+        self.max_queue       = max_queue
+        self.timeout         = timeout
+        self.waiting         = 0
+        self.active          = 0
+
+        self._loop   = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="assistant-backend", daemon=True)
+        self._thread.start()
+
+        async def setup():
+            http = httpx.AsyncClient(limits=httpx.Limits(max_connections=max_concurrency,
+                                                         max_keepalive_connections=max_concurrency))
+            client = AsyncGroq(api_key=api_key, base_url=base_url, timeout=timeout,
+                               max_retries=1, http_client=http)
+            return client, asyncio.Semaphore(max_concurrency)
+
+        self._client, self._slots = asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    # ── async API ────────────────────────────────────────────────────────────
+    async def astream(self, messages, temperature=0.1):
+        """Yield content tokens for ``messages`` from the upstream streaming API."""
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            raise BackendBusy("The assistant is busy, please try again in a moment.")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            stream = await self._client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.choices:
+                        yield chunk.choices[0].delta.content or ""
+            finally:
+                await stream.close()
+        except APIError as exc:
+            status = f" (HTTP {exc.status_code})" if isinstance(exc, APIStatusError) else ""
+            raise BackendUnavailable(f"The assistant is unavailable right now{status}, please try again later.") from exc
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    async def _pump(self, messages, temperature, tokens):
+        try:
+            async for token in self.astream(messages, temperature):
+                tokens.put(token)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            tokens.put(exc)
+        finally:
+            tokens.put(_DONE)
+
+    # ── sync bridge for the Streamlit script thread ──────────────────────────
+    def stream(self, messages, temperature=0.1):
+        """Blocking token generator; closing it cancels the upstream request."""
+        tokens = queue.SimpleQueue()
+        future = asyncio.run_coroutine_threadsafe(self._pump(messages, temperature, tokens), self._loop)
+        try:
+            while True:
+                try:
+                    item = tokens.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No response from the assistant in {self.timeout:.0f}s.") from None
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def stats(self):
+        return {"active": self.active, "waiting": self.waiting,
+                "max_concurrency": self.max_concurrency, "max_queue": self.max_queue}
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,148 @@
+"""Response cache for the AI Grade Assistant.
+
+Answers are keyed on a normalized hash of the system prompt, the UI context and
+the message history, so repeated questions asked against the same inputs never
+reach the LLM twice. Two backends share one interface: an in-process LRU and a
+SQLite file that survives restarts. Both evict least-recently-used entries and
+expire entries older than the TTL.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL         = 24 * 3600
+DEFAULT_DB_PATH     = os.path.join(os.path.expanduser("~"), ".cache", "grade_calcu", "responses.sqlite3")
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+
+def cache_key(system_prompt, ctx_text, messages):
+    """Stable hash of everything that determines the model's answer."""
+    payload = {
+        "system":   _normalize(system_prompt),
+        "context":  _normalize(ctx_text),
+        "messages": [[m["role"], _normalize(m["content"])] for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self._data       = OrderedDict()   # key → (stored_at, answer)
+        self._lock       = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if time.time() - item[0] > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def put(self, key, answer):
+        with self._lock:
+            self._data[key] = (time.time(), answer)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    def __init__(self, path=DEFAULT_DB_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, answer TEXT NOT NULL,
+                stored_at REAL NOT NULL, used_at REAL NOT NULL)""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses(used_at)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT answer, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key, answer):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, answer, now, now))
+            self._conn.execute("""DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)""", (self.max_entries,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """Backend wrapper that counts hits and misses."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits    = 0
+        self.misses  = 0
+
+    def get(self, key):
+        answer = self.backend.get(key)
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def put(self, key, answer):
+        if answer:
+            self.backend.put(key, answer)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries":  len(self.backend),
+        }
+
+
+def make_cache(backend=None):
+    """
+    Build the cache from GRADE_CACHE_BACKEND ("memory" or "sqlite"),
+    GRADE_CACHE_PATH, GRADE_CACHE_SIZE and GRADE_CACHE_TTL.
+    """
+    backend     = backend or os.environ.get("GRADE_CACHE_BACKEND", "memory")
+    max_entries = int(os.environ.get("GRADE_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+    ttl         = float(os.environ.get("GRADE_CACHE_TTL", DEFAULT_TTL))
+    if backend == "sqlite":
+        path = os.environ.get("GRADE_CACHE_PATH", DEFAULT_DB_PATH)
+        return ResponseCache(SQLiteBackend(path, max_entries, ttl))
+    if backend == "memory":
+        return ResponseCache(MemoryBackend(max_entries, ttl))
+    raise ValueError(f"Unknown cache backend: {backend!r}")
@@ -0,0 +1,59 @@
+"""Token-budgeted context window for the AI Grade Assistant.
+
+The system prompt (which already carries the UI context) is always sent; the
+newest turns are kept until the budget is spent, and older turns are folded
+into a one-line summary of the questions that were asked.
+"""
+import math
+import os
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("GRADE_CHAT_TOKEN_BUDGET", 3000))
+SUMMARY_TOKENS       = 200
+MESSAGE_OVERHEAD     = 4      # role/separator tokens per chat message
+CHARS_PER_TOKEN      = 4
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English/Llama tokenizers)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def summarize(dropped, budget=SUMMARY_TOKENS):
+    """One system note listing the user questions from dropped turns, oldest first."""
+    questions = [m["content"].strip().replace("\n", " ") for m in dropped if m["role"] == "user"]
+    note = f"Earlier conversation ({len(dropped)} messages omitted). Earlier questions: "
+    max_chars = budget * CHARS_PER_TOKEN - len(note)
+    text = "; ".join(questions)
+    if len(text) > max_chars:
+        text = "…" + text[-max(max_chars - 1, 0):]
+    return {"role": "system", "content": note + text}
+
+
+def build_messages(system_prompt, history, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Return (messages, prompt_tokens) for one request. The newest message is
+    always kept; older turns are dropped oldest-first once the budget is spent.
+    """
+    system = {"role": "system", "content": system_prompt}
+    used   = message_tokens(system)
+    kept   = []
+    for i in range(len(history) - 1, -1, -1):
+        cost = message_tokens(history[i])
+        if kept and used + cost > budget - SUMMARY_TOKENS:
+            break
+        kept.append(history[i])
+        used += cost
+    kept.reverse()
+
+    dropped = history[:len(history) - len(kept)]
+    msgs = [system]
+    if dropped:
+        note = summarize(dropped)
+        msgs.append(note)
+        used += message_tokens(note)
+    msgs.extend(kept)
+    return msgs, used
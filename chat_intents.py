@@ -0,0 +1,160 @@
+"""Local answers for formula questions the app can compute itself.
+
+``answer(prompt)`` recognises a few arithmetic intents — point grade ↔
+percentage conversions, term grade calculations and "what exam score do I
+need" questions — and answers them with the grading core. Anything it does not
+fully understand returns None and goes to the LLM as before.
+"""
+import re
+
+from grading import POINT_TO_PCT, POLICY, grading_scheme, needed_exam_pct, prelim_grade, resolve_desired, term_grade
+
+TERM_ORDER = ("prelim", "midterm", "final")
+PRIOR_TERM = {"midterm": "prelim", "final": "midterm"}
+
+_NUM   = r"(\d+(?:\.\d+)?)"
+_TERM  = r"(prelim|mid-?term|final)"
+_GLUE  = r"(?:\s*(?:grade|score|exam|is|of|=|:|at|was|with|to|a|an|get|be)\s*)*\s*"
+_TERM_VALUE  = re.compile(_TERM + _GLUE + _NUM + r"\s*%?")
+_CS_VALUE    = re.compile(r"(?:\bcs\b|class\s*standing)" + _GLUE + _NUM)
+_EXAM_VALUE  = re.compile(r"\bexam" + _GLUE + _NUM)
+_NOQ_VALUE   = re.compile(r"(?:out\s+of\s+|/\s*)" + _NUM + r"|" + _NUM + r"\s*(?:items|questions)")
+_FOR_TERM    = re.compile(r"\b(?:for|on|in)\s+(?:the\s+|my\s+)?" + _TERM)
+_TARGET      = re.compile(r"(?:desired|target|want|get|reach|aim for|\bfor)" + _GLUE + _NUM)
+_POINT_ONLY  = re.compile(r"^\D*?(\d(?:\.\d{1,2})?)\D*$")
+_PCT_ONLY    = re.compile(r"^\D*?(\d{2,3}(?:\.\d+)?)\s*(?:%|percent)?\D*$")
+_NEED_VERB   = re.compile(r"\b(?:need|needed|needs|required|require|requires|want|wants|have to|must|aim for)\b"
+                         r"|\bwhat(?:'s| is)?\s+(?:the\s+|my\s+)?exam\s+(?:score|grade)\b")
+# Conversions answer only when asked for one, never on "the only number in the sentence".
+_TO_PCT      = re.compile(r"\b(?:convert|conversion|equivalent|equal to)\b"
+                         r"|\b(?:in|to|into|as)\s+(?:a\s+)?(?:%|percent(?:age)?\b)"
+                         r"|\bwhat\s+percent(?:age)?\s+is\b|\bhow\s+many\s+percent\b")
+_TO_POINT    = re.compile(r"\b(?:convert|conversion|equivalent|equal to)\b"
+                         r"|\b(?:in|to|into|as)\s+(?:a\s+)?(?:points?|point\s+grade)\b"
+                         r"|\bwhat\s+(?:point\s+)?grade\s+is\s+\d+(?:\.\d+)?\s*(?:%|percent)")
+_ASK_GRADE   = re.compile(r"\bwhat(?:'s| is| will be)? my " + _TERM + r" grade\b")
+
+
+def _term(name):
+    return "midterm" if name.startswith("mid") else name
+
+
+def _fmt(x):
+    return f"{x:.2f}".rstrip("0").rstrip(".")
+
+
+def _needed_exam(text):
+    # "What is my X grade … if I want Y" could be either question — leave it to the LLM.
+    if not _NEED_VERB.search(text) or _ASK_GRADE.search(text):
+        return None
+    cs = _CS_VALUE.search(text)
+    if cs is None:
+        return None
+    cs = float(cs.group(1))
+
+    values = {_term(m.group(1)): float(m.group(2)) for m in _TERM_VALUE.finditer(text)}
+    asked  = _FOR_TERM.search(text)
+    term   = _term(asked.group(1)) if asked else next((t for t in reversed(TERM_ORDER) if t in values), None)
+    if term is None:
+        return None
+    target = _TARGET.search(text)
+    desired = float(target.group(1)) if target else values.get(term)
+    if desired is None:
+        return None
+    prior = None
+    if term in PRIOR_TERM:
+        prior = values.get(PRIOR_TERM[term])
+        if prior is None:
+            return None
+
+    desired_pct, converted, point = resolve_desired(desired)
+    needed = float(needed_exam_pct(desired_pct, cs, prior))
+    noq    = _NOQ_VALUE.search(text)
+    noq    = float(noq.group(1) or noq.group(2)) if noq else None
+
+    label = term.capitalize()
+    w     = POLICY.weight_labels()
+    lines = []
+    if converted:
+        lines.append(f"Point grade **{point:.2f}** → target **{desired_pct:.0f}%**.")
+    if prior is None:
+        lines.append(f"{label}: exam = (desired − {w['cs']}×cs) / {w['exam']} = "
+                     f"({_fmt(desired_pct)} − {w['cs']}×{_fmt(cs)}) / {w['exam']}")
+    else:
+        lines.append(f"{label}: partial_needed = ({_fmt(desired_pct)} − {w['prior']}×{_fmt(prior)}) / {w['partial']}, "
+                     f"exam = (partial_needed − {w['cs']}×{_fmt(cs)}) / {w['exam']}")
+    if needed < 0:
+        lines.append(f"Your current inputs already exceed {desired_pct:.0f}% — you're on track!")
+    elif needed > 100:
+        lines.append(f"Cannot reach {desired_pct:.0f}% — you would need **{needed:.1f}%** on the exam.")
+    else:
+        score = f" (**{needed * noq / 100:.1f} / {_fmt(noq)}** items)" if noq else ""
+        lines.append(f"You need **{needed:.1f}%** on the {label} exam{score}.")
+    return "\n\n".join(lines)
+
+
+def _term_grade(text):
+    if not re.search(r"\b(?:calculate|compute|what(?:'s| is)?)\b", text) or _NEED_VERB.search(text):
+        return None
+    cs, exam = _CS_VALUE.search(text), _EXAM_VALUE.search(text)
+    if cs is None or exam is None:
+        return None
+    cs, exam = float(cs.group(1)), float(exam.group(1))
+    w = POLICY.weight_labels()
+    values = {_term(m.group(1)): float(m.group(2)) for m in _TERM_VALUE.finditer(text)}
+    asked  = _FOR_TERM.search(text) or re.search(_TERM + r"\s+grade", text)
+    term   = _term(asked.group(1)) if asked else ("prelim" if not values else None)
+    if term is None:
+        return None
+    if term == "prelim":
+        grade = float(prelim_grade(cs, exam))
+        how   = f"{w['cs']}×{_fmt(cs)} + {w['exam']}×{_fmt(exam)}"
+    else:
+        prior = values.get(PRIOR_TERM[term])
+        if prior is None:
+            return None
+        grade = float(term_grade(cs, exam, prior))
+        how   = f"{w['partial']}×({w['cs']}×{_fmt(cs)} + {w['exam']}×{_fmt(exam)}) + {w['prior']}×{_fmt(prior)}"
+    points, desc = grading_scheme(grade)
+    return f"{term.capitalize()} grade = {how} = **{grade:.2f}%** → **{points:.2f} {desc}**."
+
+
+def _point_to_pct(text):
+    if not _TO_PCT.search(text):
+        return None
+    m = _POINT_ONLY.match(text)
+    if m is None:
+        return None
+    point = float(m.group(1))
+    if point not in POINT_TO_PCT:
+        return None
+    pct = POINT_TO_PCT[point]
+    if point == POLICY.points[0]:
+        return f"A **{point:.2f} ({POLICY.descriptors[0]})** is anything below **{_fmt(POLICY.pass_pct)}%**."
+    return f"A **{point:.2f} ({grading_scheme(pct)[1]})** starts at **{pct:.0f}%**."
+
+
+def _pct_to_point(text):
+    if not _TO_POINT.search(text):
+        return None
+    m = _PCT_ONLY.match(text)
+    if m is None:
+        return None
+    pct = float(m.group(1))
+    if not 0 <= pct <= POLICY.max_pct:
+        return None
+    points, desc = grading_scheme(pct)
+    return f"**{_fmt(pct)}%** is a **{points:.2f} ({desc})**."
+
+
+INTENTS = (_term_grade, _needed_exam, _point_to_pct, _pct_to_point)
+
+
+def answer(prompt):
+    """Return a locally computed answer, or None to fall through to the LLM."""
+    text = re.sub(r"\s+", " ", prompt.lower()).strip()
+    for intent in INTENTS:
+        reply = intent(text)
+        if reply is not None:
+            return reply
+    return None
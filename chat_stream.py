@@ -0,0 +1,30 @@
+"""Throttled rendering of a streamed chat reply.
+
+Tokens are collected in a list and flushed to the placeholder only when the
+time or size budget is spent, instead of re-rendering the whole markdown on
+every token. A final full render always follows the last token.
+"""
+import time
+
+FLUSH_INTERVAL = 0.05   # seconds between intermediate renders
+FLUSH_CHARS    = 200    # or sooner, once this many new characters arrived
+CURSOR         = "▌"
+
+
+def render_stream(placeholder, tokens, interval=FLUSH_INTERVAL, max_chars=FLUSH_CHARS):
+    """Render ``tokens`` into ``placeholder`` on a budget and return the full text."""
+    parts, pending, last = [], 0, time.monotonic()
+    for token in tokens:
+        if not token:
+            continue
+        parts.append(token)
+        pending += len(token)
+        now = time.monotonic()
+        if pending >= max_chars or now - last >= interval:
+            # Collapse what we have so the next flush joins only new tokens.
+            parts = ["".join(parts)]
+            placeholder.markdown(parts[0] + CURSOR)
+            pending, last = 0, now
+    full = "".join(parts)
+    placeholder.markdown(full)
+    return full
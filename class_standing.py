@@ -0,0 +1,86 @@
+"""Columnar Class Standing model.
+
+Each category holds its items as two NumPy arrays (scores, totals), so a
+category average is one vectorized division and mean, and the class standing
+is one weighted sum over the category averages — no per-item Python loops.
+``CategoryAggregate`` keeps a running sum so a single-item edit updates the
+average in O(1) instead of recomputing the category.
+"""
+import os
+
+import numpy as np
+
+CATEGORIES    = ("Quiz", "Assignment", "Seatwork", "Activity", "Laboratory", "Homework", "Recitation")
+DEFAULT_TOTAL = 100.0
+DEBUG         = os.environ.get("GRADE_DEBUG", "") not in ("", "0")
+
+
+def empty_items(n):
+    """Scores and totals arrays for ``n`` blank items."""
+    return np.zeros(n), np.full(n, DEFAULT_TOTAL)
+
+
+def resize_items(scores, totals, n):
+    """Grow (with blank items) or shrink the item arrays to ``n`` entries."""
+    if n <= len(scores):
+        return scores[:n].copy(), totals[:n].copy()
+    extra_scores, extra_totals = empty_items(n - len(scores))
+    return np.concatenate([scores, extra_scores]), np.concatenate([totals, extra_totals])
+
+
+def item_percentages(scores, totals):
+    """Percentage for every item; items with a non-positive total count as 0%."""
+    scores = np.asarray(scores, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+    return np.divide(scores * 100, totals, out=np.zeros_like(scores), where=totals > 0)
+
+
+def category_average(scores, totals):
+    return float(item_percentages(scores, totals).mean()) if len(scores) else 0.0
+
+
+def weighted_standing(averages, weights):
+    """
+    Class standing from per-category averages and weights (both in %).
+    Returns (contributions, total).
+    """
+    contributions = np.asarray(averages, dtype=float) * (np.asarray(weights, dtype=float) / 100)
+    return contributions, float(contributions.sum())
+
+
+class CategoryAggregate:
+    """Per-item percentages plus their running sum for one category."""
+
+    def __init__(self, scores, totals):
+        self.pcts    = item_percentages(scores, totals)
+        self.pct_sum = float(self.pcts.sum())
+
+    @property
+    def count(self):
+        return len(self.pcts)
+
+    @property
+    def average(self):
+        return self.pct_sum / self.count if self.count else 0.0
+
+    def set_item(self, i, score, total):
+        """O(1) update after item ``i`` changed."""
+        new = score * 100 / total if total > 0 else 0.0
+        self.pct_sum += new - self.pcts[i]
+        self.pcts[i]  = new
+
+    def resize(self, n):
+        """Drop trailing items or append blank (0%) ones."""
+        if n < self.count:
+            self.pct_sum -= float(self.pcts[n:].sum())
+            self.pcts     = self.pcts[:n].copy()
+        elif n > self.count:
+            self.pcts = np.concatenate([self.pcts, np.zeros(n - self.count)])
+
+    def verify(self, scores, totals, tol=1e-6):
+        """Compare against a full recompute; resync and return False on drift."""
+        expected = category_average(scores, totals)
+        if abs(self.average - expected) <= tol and self.count == len(scores):
+            return True
+        self.__init__(scores, totals)
+        return False
@@ -0,0 +1,97 @@
+"""Local stand-in for the Groq chat-completions streaming API.
+
+    python -m fake_llm --port 8765 --latency 0.02
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=test streamlit run grade_calcu.py
+
+Every POST to /openai/v1/chat/completions is answered with server-sent events
+in the OpenAI/Groq chunk format, one token every ``latency`` seconds. Used by
+the benchmarks and the load-test harness.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = ("To get a 2.00 you need 87% overall. With the formula "
+                 "partial_needed = (desired − (1/3)×prior) / (2/3) and "
+                 "exam = (partial_needed − 0.5×cs) / 0.5, plug in your class standing "
+                 "and prior term grade to find the exam score you need.")
+
+
+def _chunk(model, content=None, finish=None):
+    delta = {} if content is None else {"role": "assistant", "content": content}
+    return {
+        "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+        "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    }
+
+
+def make_handler(reply=DEFAULT_REPLY, latency=0.02):
+    tokens = [t + " " for t in reply.split(" ")]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body  = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = body.get("model", "fake")
+            self.server.requests += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for token in tokens:
+                    time.sleep(latency)
+                    self._event(_chunk(model, token))
+                self._event(_chunk(model, finish="stop"))
+                self._write(b"data: [DONE]\n\n")
+                self._write(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                self.server.cancelled += 1
+
+        def _event(self, payload):
+            self._write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+
+        def _write(self, data):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=0, reply=DEFAULT_REPLY, latency=0.02):
+    """Start the fake server on a daemon thread and return it (``server.base_url``)."""
+    server = ThreadingHTTPServer((host, port), make_handler(reply, latency))
+    server.daemon_threads = True
+    server.requests = server.cancelled = 0
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fake_llm", description="Fake Groq streaming server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds between tokens (default: %(default)s)")
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="text streamed back for every request")
+    args = parser.parse_args(argv)
+    server = serve(args.host, args.port, args.reply, args.latency)
+    print(f"fake LLM listening on {server.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Exact fixed-point grading.
+
+Percentages are carried as integer hundredths and the policy weights as exact
+fractions, so a term grade is an integer numerator over a common denominator
+and nothing is lost to binary floating point — a true 75 is never graded as
+74.99999… The policy's rounding rule is applied once, to the term grade, and
+the band lookup then compares integers. Everything is int64 NumPy arithmetic,
+so a whole roster is still one vectorized pass.
+
+Inputs are taken to two decimals. Missing inputs (NaN) give a NaN grade and the
+failing band, like the float path.
+"""
+from functools import lru_cache
+from math import lcm
+
+import numpy as np
+
+SCALE = 100                 # fixed-point unit: hundredths of a percent
+
+
+def to_hundredths(pct):
+    """Percentages → int64 hundredths (NaN → 0, see ``missing``)."""
+    pct = np.asarray(pct, dtype=float)
+    return np.rint(np.nan_to_num(pct) * SCALE).astype(np.int64)
+
+
+def missing(*arrays):
+    mask = False
+    for a in arrays:
+        if a is not None:
+            mask = mask | np.isnan(np.asarray(a, dtype=float))
+    return mask
+
+
+@lru_cache(maxsize=8)
+def coefficients(policy, prelim):
+    """
+    Integer weights over a common denominator: Prelim → ((cs, exam), den),
+    Midterm/Final → ((cs, exam, prior), den).
+    """
+    w = policy.weights
+    if prelim:
+        fracs = (w["cs"], w["exam"])
+    else:
+        fracs = (w["partial"] * w["cs"], w["partial"] * w["exam"], w["prior"])
+    den = lcm(*(f.denominator for f in fracs))
+    return tuple(int(f * den) for f in fracs), den
+
+
+def round_hundredths(num, den, policy):
+    """
+    Apply the policy rounding rule to ``num / den`` hundredths, keeping
+    ``policy.decimals`` places. Returns int64 hundredths.
+    """
+    unit = SCALE // 10 ** policy.decimals
+    d    = den * unit
+    if policy.rounding == "down":
+        q = num // d
+    elif policy.rounding == "half_even":
+        q, r = np.divmod(num, d)
+        q = q + ((2 * r > d) | ((2 * r == d) & (q % 2 == 1)))
+    else:   # half_up
+        q = (2 * num + d) // (2 * d)
+    return q * unit
+
+
+def term_hundredths(cs, exam, prior=None, policy=None):
+    """Rounded term grade in int64 hundredths; prior=None means Prelim."""
+    coef, den = coefficients(policy, prior is None)
+    num = coef[0] * to_hundredths(cs) + coef[1] * to_hundredths(exam)
+    if prior is not None:
+        num = num + coef[2] * to_hundredths(prior)
+    return round_hundredths(num, den, policy)
+
+
+def band_index(hundredths, policy):
+    """Band index for int64 hundredths; exact integer comparison with the cutoffs."""
+    cutoffs = np.rint(policy.cutoffs * SCALE).astype(np.int64)
+    idx     = np.searchsorted(cutoffs, hundredths, side="right")
+    return np.where(hundredths <= round(policy.max_pct * SCALE), idx, 0)
+
+
+def term_grade(cs, exam, prior=None, policy=None):
+    """Rounded term grade as a float percentage (NaN where an input is missing)."""
+    grades = term_hundredths(cs, exam, prior, policy) / SCALE
+    return np.where(missing(cs, exam, prior), np.nan, grades)
+
+
+def grade_roster(cs, exam, prior=None, policy=None):
+    """Exact counterpart of ``grading.grade_roster``: (term_grades, points, descriptors)."""
+    h    = term_hundredths(cs, exam, prior, policy)
+    gone = missing(cs, exam, prior)
+    idx  = np.where(gone, 0, band_index(h, policy))
+    return np.where(gone, np.nan, h / SCALE), policy.points[idx], policy.descriptors[idx]
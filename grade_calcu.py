@@ -1,5 +1,31 @@
+import hmac
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
 import streamlit as st
-from groq import Groq
+
+import analytics
+import chat_intents
+import class_standing as cs_model
+import grade_store
+import instrumentation
+import montecarlo
+import planner
+import reports
+import roster
+import session_store
+from chat_backend import AssistantBackend, BackendBusy, BackendUnavailable
+from chat_cache import cache_key, make_cache
+from chat_history import build_messages
+from chat_stream import render_stream
+from grading import (CS_GRID, POLICY, PRIOR_GRID, grading_scheme, needed_exam_pct, prelim_grade,
+                     requirement_table, resolve_desired, term_grade)
 
 # ── Page config ────────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -9,370 +35,72 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# ── Instrumentation (opt-in: GRADE_PROFILE=1 or ?profile=1) ───────────────────
+RUN_TIMER = instrumentation.start("rerun", st.session_state.get("mode_key", "Predict Exam Score"), st.query_params.get("profile"))
+
 # ── Global CSS ─────────────────────────────────────────────────────────────────
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Plus+Jakarta+Sans:wght@300;400;500;600;700;800&family=Space+Mono:wght@400;700&display=swap');
+# The stylesheet lives in static/style.css and is served once per browser by
+# Streamlit's static file server, so a rerun only sends a <link> tag. Without
+# static serving the file is read once per process and inlined.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 
-html, body, [class*="css"], .stApp, p, span, label, div, button {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
 
-.stApp {
-    background: #080c14;
-    background-image:
-        radial-gradient(ellipse 70% 50% at 10% 0%,  rgba(56,100,220,0.16) 0%, transparent 55%),
-        radial-gradient(ellipse 50% 40% at 90% 90%, rgba(20,200,150,0.11) 0%, transparent 55%);
-}
+@st.cache_resource
+def global_css_tag():
+    path = os.path.join(STATIC_DIR, "style.css")
+    if st.get_option("server.enableStaticServing"):
+        return f"<link rel='stylesheet' href='app/static/style.css?v={int(os.path.getmtime(path))}'>"
+    with open(path, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
-/* Sidebar */
-[data-testid="stSidebar"] {
-    background: #0b0f1a !important;
-    border-right: 1px solid rgba(255,255,255,0.05) !important;
-}
-[data-testid="stSidebar"] * { font-family: 'Plus Jakarta Sans', sans-serif !important; }
-[data-testid="stSidebar"] .stRadio label { color: #a0a8c0 !important; font-size: 0.88rem !important; }
-
-/* Headings */
-h1, h2, h3, h4 {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    letter-spacing: -0.03em !important;
-    color: #dde2f0 !important;
-}
 
-/* ── Tab styling ── */
-.stTabs [data-baseweb="tab-list"] {
-    background: rgba(255,255,255,0.03) !important;
-    border-radius: 12px !important;
-    padding: 4px !important;
-    gap: 4px !important;
-    border: 1px solid rgba(255,255,255,0.07) !important;
-}
-.stTabs [data-baseweb="tab"] {
-    background: transparent !important;
-    border-radius: 9px !important;
-    color: #6b7494 !important;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    font-weight: 600 !important;
-    font-size: 0.88rem !important;
-    padding: 8px 22px !important;
-    border: none !important;
-    transition: all 0.2s !important;
-}
-.stTabs [aria-selected="true"] {
-    background: linear-gradient(135deg, #3864dc 0%, #14c896 100%) !important;
-    color: white !important;
-}
-.stTabs [data-baseweb="tab-panel"] { padding-top: 1.4rem !important; }
-
-/* Cards */
-.gc-card {
-    background: rgba(255,255,255,0.035);
-    border: 1px solid rgba(255,255,255,0.08);
-    border-radius: 16px;
-    padding: 1.5rem 1.6rem 1.6rem;
-    margin-bottom: 1rem;
-}
-.gc-card-blue {
-    background: linear-gradient(135deg, rgba(56,100,220,0.18) 0%, rgba(56,100,220,0.06) 100%);
-    border: 1px solid rgba(56,100,220,0.28);
-    border-radius: 16px;
-    padding: 1.5rem 1.6rem;
-    margin-bottom: 1rem;
-}
-.gc-card-green {
-    background: linear-gradient(135deg, rgba(20,200,150,0.16) 0%, rgba(20,200,150,0.05) 100%);
-    border: 1px solid rgba(20,200,150,0.28);
-    border-radius: 16px;
-    padding: 1.5rem 1.6rem;
-    margin-bottom: 1rem;
-}
+with RUN_TIMER.phase("css"):
+    st.markdown(global_css_tag(), unsafe_allow_html=True)
 
-/* Term pill labels */
-.term-pill {
-    display: inline-block;
-    padding: 3px 12px;
-    border-radius: 100px;
-    font-size: 0.7rem;
-    font-weight: 700;
-    text-transform: uppercase;
-    letter-spacing: 0.1em;
-    margin-bottom: 8px;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
-.pill-blue   { background: rgba(56,100,220,0.25); color: #7ca4ff; border: 1px solid rgba(56,100,220,0.4); }
-.pill-indigo { background: rgba(120,60,220,0.25); color: #c09fff; border: 1px solid rgba(120,60,220,0.4); }
-.pill-green  { background: rgba(20,200,150,0.2);  color: #30d4a8; border: 1px solid rgba(20,200,150,0.35); }
-
-.section-title {
-    font-size: 1rem;
-    font-weight: 700;
-    color: #dde2f0;
-    margin: 0 0 1rem 0;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
+# ── Assistant backend ──────────────────────────────────────────────────────────
+@st.cache_resource
+def get_assistant_backend():
+    return AssistantBackend(
+        api_key=os.environ.get("GROQ_API_KEY") or st.secrets["GROQ_API_KEY"],
+        base_url=os.environ.get("GROQ_BASE_URL"),
+    )
 
-/* Formula box */
-.formula-box {
-    background: rgba(0,0,0,0.35);
-    border-left: 3px solid #3864dc;
-    border-radius: 0 8px 8px 0;
-    padding: 0.75rem 1rem;
-    font-family: 'Space Mono', monospace !important;
-    font-size: 0.76rem;
-    color: #a0b0d8;
-    margin: 0.8rem 0 0;
-    line-height: 1.8;
-}
 
-/* Result boxes */
-.result-pass {
-    background: linear-gradient(135deg, rgba(20,200,150,0.18) 0%, rgba(56,100,220,0.12) 100%);
-    border: 1px solid rgba(20,200,150,0.35);
-    border-radius: 14px;
-    padding: 1.4rem 1.6rem;
-    text-align: center;
-    margin-top: 1rem;
-}
-.result-fail {
-    background: linear-gradient(135deg, rgba(220,60,60,0.18) 0%, rgba(56,100,220,0.10) 100%);
-    border: 1px solid rgba(220,60,60,0.35);
-    border-radius: 14px;
-    padding: 1.4rem 1.6rem;
-    text-align: center;
-    margin-top: 1rem;
-}
-.result-warn {
-    background: rgba(220,60,60,0.12);
-    border: 1px solid rgba(220,60,60,0.3);
-    border-radius: 12px;
-    padding: 1rem 1.4rem;
-    color: #ff9999;
-    font-size: 0.88rem;
-    margin-top: 1rem;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
-.big-num {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    font-size: 3rem;
-    font-weight: 800;
-    background: linear-gradient(135deg, #14c896, #7ca4ff);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    background-clip: text;
-    line-height: 1;
-    letter-spacing: -0.04em;
-}
-.big-num-fail {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    font-size: 3rem;
-    font-weight: 800;
-    background: linear-gradient(135deg, #ff6b6b, #ff9966);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    background-clip: text;
-    line-height: 1;
-    letter-spacing: -0.04em;
-}
-.res-label {
-    font-size: 0.72rem;
-    font-weight: 600;
-    text-transform: uppercase;
-    letter-spacing: 0.1em;
-    color: #5a6280;
-    margin-bottom: 4px;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
-.badge {
-    display: inline-block;
-    padding: 4px 14px;
-    border-radius: 8px;
-    font-size: 0.82rem;
-    font-weight: 700;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
-.badge-purple { background: rgba(120,60,220,0.3); border:1px solid rgba(120,60,220,0.45); color: #c09fff; }
-.badge-green  { background: rgba(20,200,150,0.2); border:1px solid rgba(20,200,150,0.4);  color: #30d4a8; }
-.badge-red    { background: rgba(220,60,60,0.2);  border:1px solid rgba(220,60,60,0.4);   color: #ff9999; }
-
-/* Inputs */
-.stNumberInput input {
-    background: rgba(255,255,255,0.05) !important;
-    border: 1px solid rgba(255,255,255,0.1) !important;
-    border-radius: 10px !important;
-    color: #dde2f0 !important;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    font-size: 0.9rem !important;
-}
-.stNumberInput input:focus {
-    border-color: rgba(56,100,220,0.55) !important;
-    box-shadow: 0 0 0 3px rgba(56,100,220,0.12) !important;
-}
-label[data-testid="stWidgetLabel"] p {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    font-size: 0.85rem !important;
-    color: #8890aa !important;
-    font-weight: 500 !important;
-}
-
-/* Buttons */
-.stButton > button {
-    background: linear-gradient(135deg, #3864dc 0%, #14c896 100%) !important;
-    color: #fff !important;
-    border: none !important;
-    border-radius: 10px !important;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    font-weight: 700 !important;
-    font-size: 0.88rem !important;
-    padding: 0.55rem 1.6rem !important;
-    letter-spacing: 0.01em !important;
-    transition: opacity 0.18s, transform 0.12s !important;
-}
-.stButton > button:hover  { opacity: 0.85 !important; transform: translateY(-1px) !important; }
-.stButton > button:active { transform: translateY(0)  !important; }
+@st.cache_resource
+def get_response_cache():
+    return make_cache()
 
-/* Checkbox */
-.stCheckbox label p {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    color: #a0a8c0 !important;
-}
 
-/* Chat */
-[data-testid="stChatMessage"] {
-    background: rgba(255,255,255,0.025) !important;
-    border: 1px solid rgba(255,255,255,0.07) !important;
-    border-radius: 14px !important;
-    margin-bottom: 8px !important;
-}
-.stChatInput textarea {
-    background: rgba(255,255,255,0.05) !important;
-    border: 1px solid rgba(255,255,255,0.1) !important;
-    border-radius: 12px !important;
-    color: #dde2f0 !important;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
+@st.cache_resource
+def get_grade_store():
+    return grade_store.make_store()
 
-/* Metrics */
-[data-testid="stMetricValue"] {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    font-weight: 700 !important;
-    color: #dde2f0 !important;
-}
-[data-testid="stMetricLabel"] p {
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-    color: #6b7494 !important;
-}
 
-/* Selectbox */
-[data-testid="stSelectbox"] > div > div {
-    background: rgba(255,255,255,0.05) !important;
-    border: 1px solid rgba(255,255,255,0.1) !important;
-    border-radius: 10px !important;
-}
+@st.cache_resource
+def get_session_manager():
+    return session_store.SessionManager.from_env()
 
-/* Chip */
-.chip {
-    display: inline-block;
-    background: rgba(20,200,150,0.12);
-    border: 1px solid rgba(20,200,150,0.28);
-    border-radius: 100px;
-    padding: 2px 10px;
-    font-size: 0.75rem;
-    color: #14c896;
-    font-weight: 600;
-    margin: 2px;
-    font-family: 'Plus Jakarta Sans', sans-serif !important;
-}
 
-.gc-divider { border: none; border-top: 1px solid rgba(255,255,255,0.06); margin: 1.8rem 0; }
-
-/* Sidebar nav inactive buttons — plain, no gradient */
-[data-testid="stSidebar"] .stButton > button {
-    background: rgba(255,255,255,0.03) !important;
-    border: 1px solid rgba(255,255,255,0.07) !important;
-    border-radius: 10px !important;
-    color: #6b7494 !important;
-    font-size: 0.85rem !important;
-    font-weight: 600 !important;
-    text-align: left !important;
-    padding: 0.6rem 1rem !important;
-    margin-bottom: 6px !important;
-    transition: all 0.18s !important;
-    letter-spacing: 0 !important;
-    justify-content: flex-start !important;
-}
-[data-testid="stSidebar"] .stButton > button:hover {
-    background: rgba(255,255,255,0.06) !important;
-    color: #c0c8e0 !important;
-    transform: none !important;
-    opacity: 1 !important;
-    border-color: rgba(255,255,255,0.12) !important;
-}
+@st.cache_resource
+def get_export_pool():
+    # Report exports and section simulations run here, off the script thread; shared by all sessions.
+    return ThreadPoolExecutor(max_workers=int(os.environ.get("GRADE_EXPORT_THREADS", "2")), thread_name_prefix="export")
 
-/* Chat input — inline, not sticky */
-.stChatInput {
-    position: relative !important;
-    bottom: auto !important;
-}
-[data-testid="stChatInputContainer"] {
-    background: rgba(255,255,255,0.04) !important;
-    border: 1px solid rgba(255,255,255,0.1) !important;
-    border-radius: 14px !important;
-    padding: 4px 8px !important;
-}
 
-#MainMenu, footer { visibility: hidden; }
-header[data-testid="stHeader"] { background: transparent; }
-::-webkit-scrollbar { width: 4px; }
-::-webkit-scrollbar-thumb { background: rgba(56,100,220,0.35); border-radius: 10px; }
-</style>
-""", unsafe_allow_html=True)
+# Grade history is shown only when GRADE_ADVISOR_KEY is set and entered in the sidebar.
+ADVISOR_KEY = os.environ.get("GRADE_ADVISOR_KEY", "")
 
 
-# ── Groq client ────────────────────────────────────────────────────────────────
-@st.cache_resource
-def get_groq_client():
-    return Groq(api_key=st.secrets["GROQ_API_KEY"])
-
-
-# ── Grading scheme ─────────────────────────────────────────────────────────────
-def grading_scheme(pct):
-    if   99  <= pct <= 100: return (1.00, "Excellent")
-    elif 96  <= pct <   99: return (1.25, "Superior")
-    elif 93  <= pct <   96: return (1.50, "Meritorious")
-    elif 90  <= pct <   93: return (1.75, "Very Good")
-    elif 87  <= pct <   90: return (2.00, "Good")
-    elif 84  <= pct <   87: return (2.25, "Very Satisfactory")
-    elif 81  <= pct <   84: return (2.50, "Satisfactory")
-    elif 78  <= pct <   81: return (2.75, "Fair")
-    elif 75  <= pct <   78: return (3.00, "Passing")
-    else:                   return (5.00, "Failed")
-
-def calc_pct(score, total):
-    return (score / total * 100) if total > 0 else 0
-
-# Convert a point grade (1.00–5.00) to its minimum percentage equivalent
-POINT_TO_PCT = {
-    1.00: 99.0, 1.25: 96.0, 1.50: 93.0, 1.75: 90.0,
-    2.00: 87.0, 2.25: 84.0, 2.50: 81.0, 2.75: 78.0,
-    3.00: 75.0, 5.00: 74.0,
-}
+# ── Session data ───────────────────────────────────────────────────────────────
+# Chat history, class-standing items and a loaded roster are held by the
+# process-wide session manager, which can spill idle sessions to disk;
+# st.session_state only keeps the session id and widget values.
+if "sid" not in st.session_state:
+    st.session_state.sid = uuid.uuid4().hex
 
-def is_point_grade(val):
-    """Return True if value looks like a point grade (1.00–5.00 range)."""
-    return 1.0 <= val <= 5.0 and val not in range(6, 101)
 
-def resolve_desired(val):
-    """
-    If val is a percentage (>5), return it directly.
-    If val looks like a point grade (1.00–5.00), convert to its pct equivalent.
-    Returns (resolved_pct, was_converted, point_val)
-    """
-    if val > 5.0:
-        return val, False, None
-    # round to nearest known point grade
-    closest = min(POINT_TO_PCT.keys(), key=lambda k: abs(k - val))
-    return POINT_TO_PCT[closest], True, closest
+def session_data():
+    return get_session_manager().get(st.session_state.sid)
 
 
 # ── System prompt ──────────────────────────────────────────────────────────────
@@ -380,23 +108,9 @@ def build_system_prompt(app_mode, ctx_text=""):
     return f"""You are an expert Grade Calculator Assistant.
 
 Formulas:
-PREDICT MAJOR EXAM GRADE:
-  Prelim:   final = 0.5*cs + 0.5*exam  → exam = (desired - 0.5*cs) / 0.5
-  Midterm:  final = (2/3)*(0.5*cs + 0.5*exam) + (1/3)*prelim_grade
-            partial_needed = (desired - (1/3)*prelim) / (2/3)
-            exam = (partial_needed - 0.5*cs) / 0.5
-  Final:    final = (2/3)*(0.5*cs + 0.5*exam) + (1/3)*midterm_grade
-            partial_needed = (desired - (1/3)*midterm) / (2/3)
-            exam = (partial_needed - 0.5*cs) / 0.5
-
-CALCULATE OVERALL GRADE:
-  Prelim  = 0.5*cs + 0.5*exam
-  Midterm = (2/3)*(0.5*cs + 0.5*exam) + (1/3)*prelim_grade
-  Final   = (2/3)*(0.5*cs + 0.5*exam) + (1/3)*midterm_grade
-
-GRADING: 99-100→1.00 Excellent, 96-98→1.25 Superior, 93-95→1.50 Meritorious,
-  90-92→1.75 Very Good, 87-89→2.00 Good, 84-86→2.25 Very Satisfactory,
-  81-83→2.50 Satisfactory, 78-80→2.75 Fair, 75-77→3.00 Passing, <75→5.00 Failed
+{POLICY.formula_text()}
+
+{POLICY.grading_text()}
 
 Current mode: {app_mode}
 UI values: {ctx_text}
@@ -411,61 +125,59 @@ if "mode_key" not in st.session_state:
     st.session_state.mode_key = "Predict Exam Score"
 
 # ── Sidebar ────────────────────────────────────────────────────────────────────
-with st.sidebar:
-    st.markdown("""
-    <div style='padding:1.2rem 0 0.6rem;'>
-        <p style='font-size:1.55rem; font-weight:800; letter-spacing:-0.04em;
-                  margin:0; line-height:1.15;
-                  background:linear-gradient(135deg,#7ca4ff,#14c896);
-                  -webkit-background-clip:text; -webkit-text-fill-color:transparent;
-                  background-clip:text;'>Grade<br>Calculator</p>
-        <p style='font-size:0.68rem; color:#3a4060; margin:5px 0 0;
-                  text-transform:uppercase; letter-spacing:0.1em; font-weight:600;'>
-            Academic Tool · v2.1</p>
-    </div>
-    """, unsafe_allow_html=True)
-    st.markdown("<hr style='border-color:rgba(255,255,255,0.05);margin:0.6rem 0 1rem;'>", unsafe_allow_html=True)
-    st.markdown("<p style='font-size:0.65rem;font-weight:700;text-transform:uppercase;letter-spacing:0.12em;color:#2e3858;margin:0 0 0.6rem;'>Select Mode</p>", unsafe_allow_html=True)
-
-    nav_items = [
-        ("Predict Exam Score", "🔮", "Find the score you need"),
-        ("Calculate Grade",    "📊", "Compute your term grade"),
-        ("Class Standing",     "📋", "Calculate class standing"),
-    ]
-    for nkey, icon, subtitle in nav_items:
+SIDEBAR_HEADER = """
+<div class='nav-brand'>
+    <p class='nav-brand-title'>Grade<br>Calculator</p>
+    <p class='nav-brand-sub'>Academic Tool · v2.1</p>
+</div>
+<hr class='nav-rule'>
+<p class='nav-label'>Select Mode</p>"""
+
+SIDEBAR_FOOTER = """
+<hr class='nav-rule-end'>
+<p class='nav-footer'>Developed by<br><span>Edson Ray San Juan</span></p>"""
+
+NAV_ITEMS = [
+    ("Predict Exam Score", "🔮", "Find the score you need"),
+    ("Calculate Grade",    "📊", "Compute your term grade"),
+    ("Class Standing",     "📋", "Calculate class standing"),
+    ("Roster Analytics",   "📈", "Curve & distribution what-ifs"),
+]
+
+def select_mode(nkey):
+    # A callback, not st.rerun(): the run carries on with the new mode and ends normally.
+    st.session_state.mode_key = nkey
+
+
+with RUN_TIMER.phase("sidebar"), st.sidebar:
+    st.markdown(SIDEBAR_HEADER, unsafe_allow_html=True)
+    for nkey, icon, subtitle in NAV_ITEMS:
         is_active = st.session_state.mode_key == nkey
         if is_active:
-            st.markdown(f"""
-            <div style='background:linear-gradient(135deg,rgba(56,100,220,0.22),rgba(20,200,150,0.14));
-                        border:1px solid rgba(56,100,220,0.38); border-radius:10px;
-                        padding:0.6rem 1rem; margin-bottom:6px; cursor:default;'>
-                <div style='display:flex;align-items:center;gap:8px;'>
-                    <span style='font-size:1rem;'>{icon}</span>
-                    <div>
-                        <p style='margin:0;font-size:0.85rem;font-weight:700;color:#dde2f0;'>{nkey}</p>
-                        <p style='margin:0;font-size:0.68rem;color:#5a7090;'>{subtitle}</p>
-                    </div>
-                </div>
-            </div>""", unsafe_allow_html=True)
+            st.markdown(f"<div class='nav-active'><span class='nav-active-icon'>{icon}</span><div>"
+                        f"<p class='nav-active-title'>{nkey}</p><p class='nav-active-sub'>{subtitle}</p></div></div>",
+                        unsafe_allow_html=True)
         else:
-            if st.button(f"{icon}  {nkey}", key=f"nav_{nkey}", use_container_width=True):
-                st.session_state.mode_key = nkey
-                st.rerun()
-
-    st.markdown("<hr style='border-color:rgba(255,255,255,0.05);margin:1rem 0;'>", unsafe_allow_html=True)
-    st.markdown("""
-    <p style='font-size:0.7rem; color:#2e3450; line-height:1.7; margin:0;'>
-        Developed by<br>
-        <span style='color:#5a6280; font-weight:600;'>Edson Ray San Juan</span>
-    </p>""", unsafe_allow_html=True)
+            st.button(f"{icon}  {nkey}", key=f"nav_{nkey}", on_click=select_mode, args=(nkey,), use_container_width=True)
+    with st.expander("🗂️ Student record"):
+        st.text_input("Student ID", key="store_student", help="Calculations are saved to your grade history while this is filled in.")
+        st.text_input("Section", key="store_section")
+        if ADVISOR_KEY:
+            st.text_input("Advisor key", type="password", key="advisor_key", help="Shows the recorded grade history.")
+    st.markdown(SIDEBAR_FOOTER, unsafe_allow_html=True)
 
 mode_key = st.session_state.mode_key
 
 
+# ── Formula weights ────────────────────────────────────────────────────────────
+# Shown as 0.5, (2/3), … from the active policy.
+W = POLICY.weight_labels()
+
+
 # ── Helper: result card ────────────────────────────────────────────────────────
 def show_grade_card(grade, label="Your Grade"):
     gv, desc = grading_scheme(grade)
-    passed   = grade >= 75
+    passed   = grade >= POLICY.pass_pct
     cls      = "result-pass" if passed else "result-fail"
     num_cls  = "big-num"     if passed else "big-num-fail"
     bdg_cls  = "badge-green" if passed else "badge-red"
@@ -481,231 +193,588 @@ def show_grade_card(grade, label="Your Grade"):
     </div>""", unsafe_allow_html=True)
 
 
+# ── Helper: grade history ──────────────────────────────────────────────────────
+def record_calc(term, kind, inputs, grade=None):
+    """
+    Queue a calculation for the identified student; no-op without a Student ID.
+    Predictions pass no grade (their target is in ``inputs``), so they never
+    show up as grades in section queries.
+    """
+    student = st.session_state.get("store_student", "").strip()
+    if student:
+        points = None if grade is None else grading_scheme(grade)[0]
+        get_grade_store().record(student, term, kind, inputs, grade, points,
+                                 section=st.session_state.get("store_section", ""))
+
+
+def advisor_mode():
+    return bool(ADVISOR_KEY) and hmac.compare_digest(st.session_state.get("advisor_key", ""), ADVISOR_KEY)
+
+
+def show_history():
+    # Anyone can type any Student ID, so recorded grades are shown to advisors only.
+    student = st.session_state.get("store_student", "").strip()
+    if not student or not advisor_mode():
+        return
+    with st.expander(f"🗂️ Grade history — {student}"):
+        rows = get_grade_store().by_student(student)
+        if not rows:
+            st.caption("Nothing recorded yet.")
+            return
+        hist = pd.DataFrame(rows)
+        hist["recorded_at"] = pd.to_datetime(hist["recorded_at"], unit="s")
+        hist["target"]      = [r["inputs"].get("target") for r in rows]
+        st.dataframe(hist[["recorded_at", "section", "term", "kind", "grade", "points", "target"]].iloc[::-1],
+                     hide_index=True, use_container_width=True)
+
+
+# ── Helper: UI context for the assistant ───────────────────────────────────────
+# Panels run as fragments, so they publish their inputs to session state and the
+# chat reads whatever each panel last published instead of a returned dict.
+CTX_MODES = {
+    "Predict Exam Score": "Predict Major Exam Grade",
+    "Calculate Grade":    "Calculate Overall Grade",
+    "Class Standing":     "Calculate Class Standing",
+    "Roster Analytics":   "Roster Analytics",
+}
+
+
+def publish_ctx(mode, panel, values):
+    st.session_state.setdefault("ui_ctx", {}).setdefault(mode, {})[panel] = values
+
+
+def current_ctx(mode):
+    ctx = {"mode": CTX_MODES[mode]}
+    for values in st.session_state.get("ui_ctx", {}).get(mode, {}).values():
+        ctx.update(values)
+    return ctx
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # MODE 1 — PREDICT EXAM SCORE  (all 3 terms as tabs)
 # ══════════════════════════════════════════════════════════════════════════════
+@st.fragment
+def predict_prelim_panel():
+    st.markdown("<span class='term-pill pill-blue'>Prelim Term</span>", unsafe_allow_html=True)
+    st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0.4rem 0 0.8rem;'>💡 Enter a <b>percentage</b> (e.g. 85) or a <b>point grade</b> (e.g. 2.00) — auto-converted.</p>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    c1, c2 = st.columns(2, gap="medium")
+    with c1:
+        p_des = st.number_input("Desired Prelim Grade (% or point)", 0.0, 100.0, 85.0, 0.5, key="pp_des")
+        p_noq = st.number_input("No. of Exam Questions", 1, step=1, value=50, key="pp_noq")
+    with c2:
+        p_cs  = st.number_input("Class Standing (%)", 0.0, 100.0, 0.0, 0.5, key="pp_cs")
+        st.markdown(f"<div class='formula-box'>final = {W['cs']} × cs + {W['exam']} × exam<br>→ exam = (desired − {W['cs']}×cs) / {W['exam']}</div>", unsafe_allow_html=True)
+    publish_ctx("Predict Exam Score", "prelim", {"prelim_desired": p_des, "prelim_cs": p_cs, "prelim_noq": p_noq})
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    if st.button("Calculate Needed Prelim Score →", key="btn_pp", use_container_width=True):
+        p_des_pct, was_conv, pt_val = resolve_desired(p_des)
+        if was_conv:
+            st.markdown(f"<div class='result-warn' style='background:rgba(56,100,220,0.1);border-color:rgba(56,100,220,0.3);color:#7ca4ff;'>ℹ️ Detected point grade <b>{pt_val:.2f}</b> → using <b>{p_des_pct:.0f}%</b> as target.</div>", unsafe_allow_html=True)
+        needed_pct   = float(needed_exam_pct(p_des_pct, p_cs))
+        needed_score = needed_pct * (p_noq / 100)
+        record_calc("prelim", "predict", {"cs": p_cs, "noq": p_noq, "target": p_des_pct, "needed_pct": needed_pct})
+        if needed_pct < 0:
+            st.markdown(f"<div class='result-warn'>⚠️ Your Class Standing ({p_cs}%) already exceeds the target — you only need to show up and pass!</div>", unsafe_allow_html=True)
+        elif needed_pct > 100 or needed_score > p_noq:
+            st.markdown(f"<div class='result-warn'>⚠️ Cannot reach {p_des_pct:.0f}% — your Class Standing is too low to make it possible.</div>", unsafe_allow_html=True)
+        else:
+            st.markdown(f"""
+            <div class='result-pass'>
+                <div class='res-label'>Score needed on Prelim exam</div>
+                <div class='big-num'>{needed_score:.1f} <span style='font-size:1.3rem;color:#4a5880;'>/ {p_noq}</span></div>
+                <div style='margin-top:8px;'><span class='chip'>= {needed_pct:.1f}% correct</span></div>
+            </div>""", unsafe_allow_html=True)
+
+
+@st.fragment
+def predict_midterm_panel():
+    st.markdown("<span class='term-pill pill-indigo'>Mid-Term</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0 0 0.8rem;'>💡 You can enter a <b>percentage</b> (e.g. 85) <i>or</i> a <b>point grade</b> (e.g. 2.00) for the desired grade — it will be auto-converted.</p>", unsafe_allow_html=True)
+    c1, c2 = st.columns(2, gap="medium")
+    with c1:
+        m_des    = st.number_input("Desired Midterm Grade (% or point)", 0.0, 100.0, 85.0, 0.5, key="pm_des")
+        m_noq    = st.number_input("No. of Exam Questions", 1, step=1, value=50, key="pm_noq")
+    with c2:
+        m_cs     = st.number_input("Midterm Class Standing (%)", 0.0, 100.0, 0.0, 0.5, key="pm_cs")
+        m_prelim = st.number_input("Your Prelim Grade (%)",      0.0, 100.0, 0.0, 0.5, key="pm_pg")
+    st.markdown(f"""
+    <div class='formula-box'>
+        final = {W['partial']}×({W['cs']}×cs + {W['exam']}×exam) + {W['prior']}×prelim<br>
+        partial_needed = (desired − {W['prior']}×prelim) / {W['partial']}<br>
+        → exam = (partial_needed − {W['cs']}×cs) / {W['exam']}
+    </div>""", unsafe_allow_html=True)
+    publish_ctx("Predict Exam Score", "midterm", {"midterm_desired": m_des, "midterm_cs": m_cs, "midterm_prelim": m_prelim, "midterm_noq": m_noq})
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    if st.button("Calculate Needed Midterm Score →", key="btn_pm", use_container_width=True):
+        m_des_pct, was_conv, pt_val = resolve_desired(m_des)
+        if was_conv:
+            st.markdown(f"<div class='result-warn' style='background:rgba(56,100,220,0.1);border-color:rgba(56,100,220,0.3);color:#7ca4ff;'>ℹ️ Detected point grade <b>{pt_val:.2f}</b> → using <b>{m_des_pct:.0f}%</b> as target.</div>", unsafe_allow_html=True)
+        needed_pct     = float(needed_exam_pct(m_des_pct, m_cs, m_prelim))
+        needed_score   = needed_pct * (m_noq / 100)
+        record_calc("midterm", "predict", {"cs": m_cs, "prior": m_prelim, "noq": m_noq, "target": m_des_pct, "needed_pct": needed_pct})
+        if needed_pct < 0:
+            st.markdown(f"<div class='result-warn'>⚠️ Your current inputs already exceed the target — you're on track!</div>", unsafe_allow_html=True)
+        elif needed_pct > 100 or needed_score > m_noq:
+            st.markdown(f"<div class='result-warn'>⚠️ Cannot reach {m_des_pct:.0f}% — your Class Standing or Prelim Grade is too low.</div>", unsafe_allow_html=True)
+        else:
+            st.markdown(f"""
+            <div class='result-pass'>
+                <div class='res-label'>Score needed on Midterm exam</div>
+                <div class='big-num'>{needed_score:.1f} <span style='font-size:1.3rem;color:#4a5880;'>/ {m_noq}</span></div>
+                <div style='margin-top:8px;'><span class='chip'>= {needed_pct:.1f}% correct</span></div>
+            </div>""", unsafe_allow_html=True)
+
+
+@st.fragment
+def predict_final_panel():
+    st.markdown("<span class='term-pill pill-green'>Final Term</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0 0 0.8rem;'>💡 You can enter a <b>percentage</b> (e.g. 85) <i>or</i> a <b>point grade</b> (e.g. 2.00) for the desired grade — it will be auto-converted.</p>", unsafe_allow_html=True)
+    c1, c2 = st.columns(2, gap="medium")
+    with c1:
+        f_des     = st.number_input("Desired Final Grade (% or point)", 0.0, 100.0, 85.0, 0.5, key="pf_des")
+        f_noq     = st.number_input("No. of Exam Questions", 1, step=1, value=50, key="pf_noq")
+    with c2:
+        f_cs      = st.number_input("Final Class Standing (%)", 0.0, 100.0, 0.0, 0.5, key="pf_cs")
+        f_midterm = st.number_input("Your Midterm Grade (%)",   0.0, 100.0, 0.0, 0.5, key="pf_mg")
+    st.markdown(f"""
+    <div class='formula-box'>
+        final = {W['partial']}×({W['cs']}×cs + {W['exam']}×exam) + {W['prior']}×midterm<br>
+        partial_needed = (desired − {W['prior']}×midterm) / {W['partial']}<br>
+        → exam = (partial_needed − {W['cs']}×cs) / {W['exam']}
+    </div>""", unsafe_allow_html=True)
+    publish_ctx("Predict Exam Score", "final", {"final_desired": f_des, "final_cs": f_cs, "final_midterm": f_midterm, "final_noq": f_noq})
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    if st.button("Calculate Needed Final Score →", key="btn_pf", use_container_width=True):
+        f_des_pct, was_conv, pt_val = resolve_desired(f_des)
+        if was_conv:
+            st.markdown(f"<div class='result-warn' style='background:rgba(56,100,220,0.1);border-color:rgba(56,100,220,0.3);color:#7ca4ff;'>ℹ️ Detected point grade <b>{pt_val:.2f}</b> → using <b>{f_des_pct:.0f}%</b> as target.</div>", unsafe_allow_html=True)
+        needed_pct     = float(needed_exam_pct(f_des_pct, f_cs, f_midterm))
+        needed_score   = needed_pct * (f_noq / 100)
+        record_calc("final", "predict", {"cs": f_cs, "prior": f_midterm, "noq": f_noq, "target": f_des_pct, "needed_pct": needed_pct})
+        if needed_pct < 0:
+            st.markdown(f"<div class='result-warn'>⚠️ Your current inputs already exceed the target — you're on track!</div>", unsafe_allow_html=True)
+        elif needed_pct > 100 or needed_score > f_noq:
+            st.markdown(f"<div class='result-warn'>⚠️ Cannot reach {f_des_pct:.0f}% — your Class Standing or Midterm Grade is too low.</div>", unsafe_allow_html=True)
+        else:
+            st.markdown(f"""
+            <div class='result-pass'>
+                <div class='res-label'>Score needed on Final exam</div>
+                <div class='big-num'>{needed_score:.1f} <span style='font-size:1.3rem;color:#4a5880;'>/ {f_noq}</span></div>
+                <div style='margin-top:8px;'><span class='chip'>= {needed_pct:.1f}% correct</span></div>
+            </div>""", unsafe_allow_html=True)
+
+
+def need_shade(pct):
+    """Heat-map cell style for a needed exam percentage: met, feasible or impossible."""
+    if pct < 0:
+        return "background-color:rgba(40,180,120,0.25);color:#5fd6a0"
+    if pct > 100:
+        return "background-color:rgba(220,70,70,0.2);color:#ff8a8a"
+    return f"background-color:rgba(56,100,220,{0.1 + 0.5 * pct / 100:.2f});color:#dce4ff"
+
+
+@st.fragment
+def predict_requirements_panel():
+    st.markdown("<span class='term-pill pill-blue'>Requirements Matrix</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0 0 0.8rem;'>💡 Exam score needed for every target grade across a range of class standings. ✓ = already met, ✗ = cannot be reached.</p>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns(3, gap="medium")
+    with c1:
+        term  = st.selectbox("Term", ["Prelim", "Midterm", "Final"], key="rq_term")
+    with c2:
+        noq   = st.number_input("No. of Exam Questions", 1, step=1, value=50, key="rq_noq")
+    with c3:
+        prior = st.number_input("Your Prior-Term Grade (%)", float(PRIOR_GRID[0]), float(PRIOR_GRID[-1]), 85.0, 1.0,
+                                key="rq_prior", disabled=term == "Prelim")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    points, needed_pct, needed_score = requirement_table(term.lower(), int(noq))
+    if term != "Prelim":
+        i = int(round(prior - PRIOR_GRID[0]))
+        needed_pct, needed_score = needed_pct[..., i], needed_score[..., i]
+
+    # Same thresholds as the single-target warnings: < 0 met, > 100% impossible.
+    def cell(pct, score):
+        if pct < 0:
+            return "✓"
+        if pct > 100 or score > noq:
+            return "✗"
+        return f"{score:.1f}"
+
+    index   = [f"{p:.2f} ({POLICY.point_to_pct[p]:.0f}%)" for p in points]
+    columns = [f"CS {c:.0f}%" for c in CS_GRID]
+    labels  = pd.DataFrame([[cell(p, s) for p, s in zip(rp, rs)] for rp, rs in zip(needed_pct, needed_score)],
+                           index=index, columns=columns)
+    colors  = pd.DataFrame(needed_pct, index=index, columns=columns).map(need_shade)
+    st.dataframe(labels.style.apply(lambda _: colors, axis=None), use_container_width=True)
+    st.caption(f"Cells show the score needed out of {int(noq)} questions.")
+
+
+@st.fragment
+def predict_semester_panel():
+    st.markdown("<span class='term-pill pill-green'>Whole Semester</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0 0 0.8rem;'>💡 One Final-grade target for the whole chain — tick the exams you've already taken and the planner solves the rest.</p>", unsafe_allow_html=True)
+    c1, c2 = st.columns(2, gap="medium")
+    with c1:
+        des    = st.number_input("Target Final Grade (% or point)", 0.0, 100.0, 85.0, 0.5, key="sp_des")
+    with c2:
+        # A term not yet taken has no class standing; the plan states this assumption.
+        assume = st.number_input("Assumed Class Standing for terms not taken (%)", 0.0, 100.0, 85.0, 0.5, key="sp_assume_cs")
+    cs, exams = {}, {}
+    for col, term in zip(st.columns(3, gap="medium"), planner.TERMS):
+        name = term.capitalize()
+        with col:
+            taken    = st.checkbox(f"{name} exam taken", key=f"sp_{term}_taken")
+            known    = st.number_input(f"{name} Class Standing (%)", 0.0, 100.0, 85.0, 0.5, key=f"sp_{term}_cs", disabled=not taken)
+            score    = st.number_input(f"{name} Exam Score (%)", 0.0, 100.0, 0.0, 0.5, key=f"sp_{term}_ex", disabled=not taken)
+            cs[term]    = known if taken else assume
+            exams[term] = score if taken else None
+    _, k = planner.coefficients()
+    st.markdown(f"<div class='formula-box'>final = Σ (cs weight × cs + exam weight × exam) over the chained terms<br>"
+                f"exam weights: prelim {k['prelim']:.3f} · midterm {k['midterm']:.3f} · final {k['final']:.3f}</div>", unsafe_allow_html=True)
+    publish_ctx("Predict Exam Score", "semester", {"semester_target": des, "semester_assumed_cs": assume,
+                                                  **{f"semester_{t}_cs": v for t, v in cs.items() if exams[t] is not None},
+                                                  **{f"semester_{t}_exam": v for t, v in exams.items() if v is not None}})
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    target, was_conv, pt_val = resolve_desired(des)
+    if was_conv:
+        st.markdown(f"<div class='result-warn' style='background:rgba(56,100,220,0.1);border-color:rgba(56,100,220,0.3);color:#7ca4ff;'>ℹ️ Detected point grade <b>{pt_val:.2f}</b> → using <b>{target:.0f}%</b> as target.</div>", unsafe_allow_html=True)
+    t0     = time.perf_counter()
+    result = planner.plan(target, cs, exams)
+    ms     = (time.perf_counter() - t0) * 1000
+    if not result.remaining:
+        show_grade_card(result.current, "Final Grade")
+        return
+    names = " + ".join(t.capitalize() for t in result.remaining)
+    if result.balanced < 0:
+        st.markdown("<div class='result-warn'>⚠️ Your current inputs already exceed the target — you're on track!</div>", unsafe_allow_html=True)
+    elif result.balanced > 100:
+        st.markdown(f"<div class='result-warn'>⚠️ Cannot reach {target:.0f}% — even perfect {names} exams fall short.</div>", unsafe_allow_html=True)
+    else:
+        grades = planner.term_grades(cs, {t: result.balanced if v is None else v for t, v in exams.items()})
+        chips  = "".join(f"<span class='chip'>{t.capitalize()} grade {float(g):.1f}%</span> " for t, g in grades.items())
+        st.markdown(f"""
+        <div class='result-pass'>
+            <div class='res-label'>Score needed on every remaining exam ({names})</div>
+            <div class='big-num'>{result.balanced:.1f}%</div>
+            <div style='margin-top:8px;'>{chips}</div>
+        </div>""", unsafe_allow_html=True)
+    st.caption(f"{names} class standing is not known yet; assumed {assume:g}% (set above).")
+
+    if result.needed.ndim:
+        *free, last = result.remaining
+        labels = np.where(result.needed < 0, "✓", np.where(result.needed > 100, "✗", np.char.mod("%.1f%%", result.needed)))
+        rows   = [f"{free[0].capitalize()} {g:.0f}%" for g in result.grid]
+        if len(free) == 1:
+            columns, labels, needed = [f"{last.capitalize()} exam needed"], labels[:, None], result.needed[:, None]
+        else:
+            columns, needed = [f"{free[1].capitalize()} {g:.0f}%" for g in result.grid], result.needed
+        table  = pd.DataFrame(labels, index=rows, columns=columns)
+        colors = pd.DataFrame(needed, index=rows, columns=columns).map(need_shade)
+        st.dataframe(table.style.apply(lambda _: colors, axis=None), use_container_width=True)
+        st.caption(f"Minimum {last.capitalize()} exam score for each combination of earlier exams · "
+                   f"{result.needed.size} combinations solved in {ms:.2f} ms.")
+
+
 def predict_major_exam_grade():
     st.markdown("<p style='color:#5a6280;font-size:0.88rem;margin:-0.4rem 0 1.2rem;'>Enter your desired grade and known scores — find exactly what you need on each exam.</p>", unsafe_allow_html=True)
-    ctx = {"mode": "Predict Major Exam Grade"}
 
-    t1, t2, t3 = st.tabs(["📘  Prelim", "📗  Mid-Term", "📙  Final"])
+    t1, t2, t3, t4, t5 = st.tabs(["📘  Prelim", "📗  Mid-Term", "📙  Final", "🧮  Requirements", "🗓️  Semester Plan"])
 
     # PRELIM
     with t1:
-        st.markdown("<span class='term-pill pill-blue'>Prelim Term</span>", unsafe_allow_html=True)
-        st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0.4rem 0 0.8rem;'>💡 Enter a <b>percentage</b> (e.g. 85) or a <b>point grade</b> (e.g. 2.00) — auto-converted.</p>", unsafe_allow_html=True)
-        st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
-        c1, c2 = st.columns(2, gap="medium")
-        with c1:
-            p_des = st.number_input("Desired Prelim Grade (% or point)", 0.0, 100.0, 85.0, 0.5, key="pp_des")
-            p_noq = st.number_input("No. of Exam Questions", 1, step=1, value=50, key="pp_noq")
-        with c2:
-            p_cs  = st.number_input("Class Standing (%)", 0.0, 100.0, 0.0, 0.5, key="pp_cs")
-            st.markdown("<div class='formula-box'>final = 0.5 × cs + 0.5 × exam<br>→ exam = (desired − 0.5×cs) / 0.5</div>", unsafe_allow_html=True)
-        ctx.update({"prelim_desired": p_des, "prelim_cs": p_cs, "prelim_noq": p_noq})
-        st.markdown("</div>", unsafe_allow_html=True)
-
-        if st.button("Calculate Needed Prelim Score →", key="btn_pp", use_container_width=True):
-            p_des_pct, was_conv, pt_val = resolve_desired(p_des)
-            if was_conv:
-                st.markdown(f"<div class='result-warn' style='background:rgba(56,100,220,0.1);border-color:rgba(56,100,220,0.3);color:#7ca4ff;'>ℹ️ Detected point grade <b>{pt_val:.2f}</b> → using <b>{p_des_pct:.0f}%</b> as target.</div>", unsafe_allow_html=True)
-            needed_pct   = (p_des_pct - 0.5 * p_cs) / 0.5
-            needed_score = needed_pct * (p_noq / 100)
-            if needed_pct < 0:
-                st.markdown(f"<div class='result-warn'>⚠️ Your Class Standing ({p_cs}%) already exceeds the target — you only need to show up and pass!</div>", unsafe_allow_html=True)
-            elif needed_pct > 100 or needed_score > p_noq:
-                st.markdown(f"<div class='result-warn'>⚠️ Cannot reach {p_des_pct:.0f}% — your Class Standing is too low to make it possible.</div>", unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class='result-pass'>
-                    <div class='res-label'>Score needed on Prelim exam</div>
-                    <div class='big-num'>{needed_score:.1f} <span style='font-size:1.3rem;color:#4a5880;'>/ {p_noq}</span></div>
-                    <div style='margin-top:8px;'><span class='chip'>= {needed_pct:.1f}% correct</span></div>
-                </div>""", unsafe_allow_html=True)
+        predict_prelim_panel()
 
     # MID-TERM
     with t2:
-        st.markdown("<span class='term-pill pill-indigo'>Mid-Term</span>", unsafe_allow_html=True)
-        st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
-        st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0 0 0.8rem;'>💡 You can enter a <b>percentage</b> (e.g. 85) <i>or</i> a <b>point grade</b> (e.g. 2.00) for the desired grade — it will be auto-converted.</p>", unsafe_allow_html=True)
-        c1, c2 = st.columns(2, gap="medium")
-        with c1:
-            m_des    = st.number_input("Desired Midterm Grade (% or point)", 0.0, 100.0, 85.0, 0.5, key="pm_des")
-            m_noq    = st.number_input("No. of Exam Questions", 1, step=1, value=50, key="pm_noq")
-        with c2:
-            m_cs     = st.number_input("Midterm Class Standing (%)", 0.0, 100.0, 0.0, 0.5, key="pm_cs")
-            m_prelim = st.number_input("Your Prelim Grade (%)",      0.0, 100.0, 0.0, 0.5, key="pm_pg")
-        st.markdown("""
-        <div class='formula-box'>
-            final = (2/3)×(0.5×cs + 0.5×exam) + (1/3)×prelim<br>
-            partial_needed = (desired − (1/3)×prelim) / (2/3)<br>
-            → exam = (partial_needed − 0.5×cs) / 0.5
-        </div>""", unsafe_allow_html=True)
-        ctx.update({"midterm_desired": m_des, "midterm_cs": m_cs, "midterm_prelim": m_prelim, "midterm_noq": m_noq})
-        st.markdown("</div>", unsafe_allow_html=True)
-
-        if st.button("Calculate Needed Midterm Score →", key="btn_pm", use_container_width=True):
-            m_des_pct, was_conv, pt_val = resolve_desired(m_des)
-            if was_conv:
-                st.markdown(f"<div class='result-warn' style='background:rgba(56,100,220,0.1);border-color:rgba(56,100,220,0.3);color:#7ca4ff;'>ℹ️ Detected point grade <b>{pt_val:.2f}</b> → using <b>{m_des_pct:.0f}%</b> as target.</div>", unsafe_allow_html=True)
-            partial_needed = (m_des_pct - (1/3) * m_prelim) / (2/3)
-            needed_pct     = (partial_needed - 0.5 * m_cs) / 0.5
-            needed_score   = needed_pct * (m_noq / 100)
-            if needed_pct < 0:
-                st.markdown(f"<div class='result-warn'>⚠️ Your current inputs already exceed the target — you're on track!</div>", unsafe_allow_html=True)
-            elif needed_pct > 100 or needed_score > m_noq:
-                st.markdown(f"<div class='result-warn'>⚠️ Cannot reach {m_des_pct:.0f}% — your Class Standing or Prelim Grade is too low.</div>", unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class='result-pass'>
-                    <div class='res-label'>Score needed on Midterm exam</div>
-                    <div class='big-num'>{needed_score:.1f} <span style='font-size:1.3rem;color:#4a5880;'>/ {m_noq}</span></div>
-                    <div style='margin-top:8px;'><span class='chip'>= {needed_pct:.1f}% correct</span></div>
-                </div>""", unsafe_allow_html=True)
+        predict_midterm_panel()
 
     # FINAL
     with t3:
-        st.markdown("<span class='term-pill pill-green'>Final Term</span>", unsafe_allow_html=True)
-        st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
-        st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0 0 0.8rem;'>💡 You can enter a <b>percentage</b> (e.g. 85) <i>or</i> a <b>point grade</b> (e.g. 2.00) for the desired grade — it will be auto-converted.</p>", unsafe_allow_html=True)
-        c1, c2 = st.columns(2, gap="medium")
-        with c1:
-            f_des     = st.number_input("Desired Final Grade (% or point)", 0.0, 100.0, 85.0, 0.5, key="pf_des")
-            f_noq     = st.number_input("No. of Exam Questions", 1, step=1, value=50, key="pf_noq")
-        with c2:
-            f_cs      = st.number_input("Final Class Standing (%)", 0.0, 100.0, 0.0, 0.5, key="pf_cs")
-            f_midterm = st.number_input("Your Midterm Grade (%)",   0.0, 100.0, 0.0, 0.5, key="pf_mg")
-        st.markdown("""
-        <div class='formula-box'>
-            final = (2/3)×(0.5×cs + 0.5×exam) + (1/3)×midterm<br>
-            partial_needed = (desired − (1/3)×midterm) / (2/3)<br>
-            → exam = (partial_needed − 0.5×cs) / 0.5
-        </div>""", unsafe_allow_html=True)
-        ctx.update({"final_desired": f_des, "final_cs": f_cs, "final_midterm": f_midterm, "final_noq": f_noq})
-        st.markdown("</div>", unsafe_allow_html=True)
-
-        if st.button("Calculate Needed Final Score →", key="btn_pf", use_container_width=True):
-            f_des_pct, was_conv, pt_val = resolve_desired(f_des)
-            if was_conv:
-                st.markdown(f"<div class='result-warn' style='background:rgba(56,100,220,0.1);border-color:rgba(56,100,220,0.3);color:#7ca4ff;'>ℹ️ Detected point grade <b>{pt_val:.2f}</b> → using <b>{f_des_pct:.0f}%</b> as target.</div>", unsafe_allow_html=True)
-            partial_needed = (f_des_pct - (1/3) * f_midterm) / (2/3)
-            needed_pct     = (partial_needed - 0.5 * f_cs) / 0.5
-            needed_score   = needed_pct * (f_noq / 100)
-            if needed_pct < 0:
-                st.markdown(f"<div class='result-warn'>⚠️ Your current inputs already exceed the target — you're on track!</div>", unsafe_allow_html=True)
-            elif needed_pct > 100 or needed_score > f_noq:
-                st.markdown(f"<div class='result-warn'>⚠️ Cannot reach {f_des_pct:.0f}% — your Class Standing or Midterm Grade is too low.</div>", unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class='result-pass'>
-                    <div class='res-label'>Score needed on Final exam</div>
-                    <div class='big-num'>{needed_score:.1f} <span style='font-size:1.3rem;color:#4a5880;'>/ {f_noq}</span></div>
-                    <div style='margin-top:8px;'><span class='chip'>= {needed_pct:.1f}% correct</span></div>
-                </div>""", unsafe_allow_html=True)
+        predict_final_panel()
 
-    return ctx
+    # REQUIREMENTS MATRIX
+    with t4:
+        predict_requirements_panel()
+
+    # WHOLE-SEMESTER PLAN
+    with t5:
+        predict_semester_panel()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # MODE 2 — CALCULATE OVERALL GRADE  (all 3 terms as tabs)
 # ══════════════════════════════════════════════════════════════════════════════
+@st.fragment
+def overall_prelim_panel():
+    st.markdown("<span class='term-pill pill-blue'>Prelim Term</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    c1, c2 = st.columns(2, gap="medium")
+    with c1:
+        p_cs   = st.number_input("Class Standing (%)",    0.0, 100.0, key="og_p_cs")
+    with c2:
+        p_exam = st.number_input("Prelim Exam Score (%)", 0.0, 100.0, key="og_p_ex")
+    st.markdown(f"<div class='formula-box'>Prelim Grade = {W['cs']} × Class Standing + {W['exam']} × Exam Score</div>", unsafe_allow_html=True)
+    publish_ctx("Calculate Grade", "prelim", {"prelim_cs": p_cs, "prelim_exam": p_exam})
+    st.markdown("</div>", unsafe_allow_html=True)
+    if st.button("Calculate Prelim Grade →", key="btn_og_p", use_container_width=True):
+        grade = float(prelim_grade(p_cs, p_exam))
+        record_calc("prelim", "grade", {"cs": p_cs, "exam": p_exam}, grade)
+        show_grade_card(grade, "Prelim Grade")
+
+
+@st.fragment
+def overall_midterm_panel():
+    st.markdown("<span class='term-pill pill-indigo'>Mid-Term</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns(3, gap="medium")
+    with c1:
+        m_cs     = st.number_input("Class Standing (%)",     0.0, 100.0, key="og_m_cs")
+    with c2:
+        m_exam   = st.number_input("Midterm Exam Score (%)", 0.0, 100.0, key="og_m_ex")
+    with c3:
+        m_prelim = st.number_input("Prelim Grade (%)",       0.0, 100.0, key="og_m_pg")
+    st.markdown(f"<div class='formula-box'>partial = {W['cs']}×cs + {W['exam']}×exam<br>Midterm Grade = {W['partial']}×partial + {W['prior']}×Prelim Grade</div>", unsafe_allow_html=True)
+    publish_ctx("Calculate Grade", "midterm", {"midterm_cs": m_cs, "midterm_exam": m_exam, "midterm_prelim": m_prelim})
+    st.markdown("</div>", unsafe_allow_html=True)
+    if st.button("Calculate Midterm Grade →", key="btn_og_m", use_container_width=True):
+        grade = float(term_grade(m_cs, m_exam, m_prelim))
+        record_calc("midterm", "grade", {"cs": m_cs, "exam": m_exam, "prior": m_prelim}, grade)
+        show_grade_card(grade, "Midterm Grade")
+
+
+@st.fragment
+def overall_final_panel():
+    st.markdown("<span class='term-pill pill-green'>Final Term</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    c1, c2, c3 = st.columns(3, gap="medium")
+    with c1:
+        f_cs      = st.number_input("Class Standing (%)",    0.0, 100.0, key="og_f_cs")
+    with c2:
+        f_exam    = st.number_input("Final Exam Score (%)",  0.0, 100.0, key="og_f_ex")
+    with c3:
+        f_midterm = st.number_input("Midterm Grade (%)",     0.0, 100.0, key="og_f_mg")
+    st.markdown(f"<div class='formula-box'>partial = {W['cs']}×cs + {W['exam']}×exam<br>Final Grade = {W['partial']}×partial + {W['prior']}×Midterm Grade</div>", unsafe_allow_html=True)
+    publish_ctx("Calculate Grade", "final", {"final_cs": f_cs, "final_exam": f_exam, "final_midterm": f_midterm})
+    st.markdown("</div>", unsafe_allow_html=True)
+    if st.button("Calculate Final Grade →", key="btn_og_f", use_container_width=True):
+        grade = float(term_grade(f_cs, f_exam, f_midterm))
+        record_calc("final", "grade", {"cs": f_cs, "exam": f_exam, "prior": f_midterm}, grade)
+        show_grade_card(grade, "Final Grade")
+
+
+@st.fragment
+def overall_roster_panel():
+    st.markdown("<span class='term-pill pill-blue'>Whole Section</span>", unsafe_allow_html=True)
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    types = ["csv", "parquet"] if roster.parquet_available() else ["csv"]
+    upload = st.file_uploader("Roster file", type=types, key="og_roster")
+    st.markdown("<div class='formula-box'>Columns: prelim_cs, prelim_exam, midterm_cs, midterm_exam, final_cs, final_exam<br>"
+                "Midterm uses the graded Prelim (or a prelim_grade column); Final uses the graded Midterm.</div>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+    if upload is not None and st.button("Grade Roster →", key="btn_og_r", use_container_width=True):
+        fmt = roster.roster_format(upload.name)
+        # Graded to disk (cleaned up with the export job directories); the file is
+        # read only when the download is clicked, once, as Streamlit serves whole files.
+        out = os.path.join(reports.new_workdir(), f"graded_{upload.name}")
+        try:
+            with open(out, "wb") as f:
+                rows = roster.grade_file(upload, f, fmt)
+        except roster.READ_ERRORS as exc:
+            shutil.rmtree(os.path.dirname(out), ignore_errors=True)
+            st.error(f"Could not read {upload.name}: {exc}")
+            return
+        publish_ctx("Calculate Grade", "roster", {"roster_rows": rows})
+        st.markdown(f"<div class='result-pass'><div class='res-label'>Roster graded</div><div class='big-num'>{rows:,}</div><div style='margin-top:8px;'><span class='chip'>rows</span></div></div>", unsafe_allow_html=True)
+        st.download_button("⬇️ Download graded roster", partial(reports.read_output, out), file_name=f"graded_{upload.name}",
+                           mime="text/csv" if fmt == "csv" else "application/octet-stream",
+                           key="dl_og_r", on_click="ignore", use_container_width=True)
+        st.caption("The download is held in memory while it is sent; grade very large sections with `python -m grade_cli`.")
+    if upload is not None:
+        roster_reports(upload)
+    else:
+        drop_export_job()
+
+
+EXPORT_WORKERS = int(os.environ.get("GRADE_EXPORT_WORKERS", "1"))
+
+
+def drop_export_job():
+    job = st.session_state.pop("export_job", None)
+    # A running export is left to finish; its directory expires with the TTL.
+    if job is not None and job.finished():
+        shutil.rmtree(os.path.dirname(job.path), ignore_errors=True)
+
+
+def roster_reports(upload):
+    kinds = [k for k, ok in (("xlsx", reports.xlsx_available()), ("pdf", reports.pdf_available())) if ok]
+    if not kinds:
+        st.caption("Printable reports need openpyxl (XLSX) or reportlab (PDF) installed.")
+        return
+    st.markdown("<span class='term-pill pill-blue'>Printable Reports</span>", unsafe_allow_html=True)
+    labels = {"xlsx": "📊 Section workbook (XLSX)", "pdf": "📄 Student grade sheets (PDF, zipped)"}
+    c1, c2 = st.columns([2, 1], gap="medium")
+    with c1:
+        kind = st.radio("Report", kinds, format_func=labels.get, horizontal=True, key="rp_kind")
+    with c2:
+        section = st.text_input("Section", value=st.session_state.get("store_section", ""), key="rp_section")
+
+    job = st.session_state.get("export_job")
+    if job is not None and job.params != upload.file_id:
+        drop_export_job()       # a report of a previous upload
+        job = None
+    if st.button("Generate Report →", key="btn_rp", use_container_width=True,
+                 disabled=job is not None and not job.finished()):
+        drop_export_job()
+        workdir = reports.new_workdir()
+        fmt     = roster.roster_format(upload.name)
+        src     = os.path.join(workdir, f"roster.{fmt}")
+        with open(src, "wb") as f:
+            f.write(upload.getvalue())
+        job = reports.submit(get_export_pool(), kind, src, os.path.join(workdir, reports.output_name(kind, upload.name)),
+                             fmt, section.strip(), EXPORT_WORKERS, params=upload.file_id)
+        st.session_state.export_job = job
+    if job is None:
+        return
+    # Refreshed on every run that shows the job, so the TTL sweep skips it.
+    reports.keep_alive(os.path.dirname(job.path))
+    if not job.finished():
+        export_progress()
+        return
+    try:
+        rows = job.result()
+    except Exception as exc:
+        st.markdown(f"<div class='result-warn'>⚠️ Report failed: {exc}</div>", unsafe_allow_html=True)
+        return
+    if not os.path.exists(job.path):
+        drop_export_job()
+        st.markdown("<div class='result-warn'>⚠️ This report has expired — generate it again.</div>", unsafe_allow_html=True)
+        return
+    # Deferred: the file is read only when the button is clicked, not on every rerun.
+    st.download_button(f"⬇️ Download {reports.EXPORTS[job.kind][1]} ({rows:,} students)",
+                       partial(reports.read_output, job.path),
+                       file_name=os.path.basename(job.path), key="dl_rp", use_container_width=True,
+                       mime="application/zip" if job.kind == "pdf" else
+                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+
+@st.fragment(run_every=0.5)
+def export_progress():
+    # Polls the background job without rerunning the page; one full rerun when it ends.
+    job = st.session_state.export_job
+    st.progress(job.fraction, text=f"Generating {reports.EXPORTS[job.kind][1]}… {job.done:,} / {job.total:,} students")
+    if job.finished():
+        st.rerun()
+
+
 def calculate_overall_grade():
     st.markdown("<p style='color:#5a6280;font-size:0.88rem;margin:-0.4rem 0 1.2rem;'>Calculate your grade for any term — fill in what you have and hit Calculate.</p>", unsafe_allow_html=True)
-    ctx = {"mode": "Calculate Overall Grade"}
 
-    t1, t2, t3 = st.tabs(["📘  Prelim", "📗  Mid-Term", "📙  Final"])
+    t1, t2, t3, t4 = st.tabs(["📘  Prelim", "📗  Mid-Term", "📙  Final", "📂  Roster"])
 
     # PRELIM
     with t1:
-        st.markdown("<span class='term-pill pill-blue'>Prelim Term</span>", unsafe_allow_html=True)
-        st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
-        c1, c2 = st.columns(2, gap="medium")
-        with c1:
-            p_cs   = st.number_input("Class Standing (%)",    0.0, 100.0, key="og_p_cs")
-        with c2:
-            p_exam = st.number_input("Prelim Exam Score (%)", 0.0, 100.0, key="og_p_ex")
-        st.markdown("<div class='formula-box'>Prelim Grade = 0.5 × Class Standing + 0.5 × Exam Score</div>", unsafe_allow_html=True)
-        ctx.update({"prelim_cs": p_cs, "prelim_exam": p_exam})
-        st.markdown("</div>", unsafe_allow_html=True)
-        if st.button("Calculate Prelim Grade →", key="btn_og_p", use_container_width=True):
-            show_grade_card(0.5 * p_cs + 0.5 * p_exam, "Prelim Grade")
+        overall_prelim_panel()
 
     # MID-TERM
     with t2:
-        st.markdown("<span class='term-pill pill-indigo'>Mid-Term</span>", unsafe_allow_html=True)
-        st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
-        c1, c2, c3 = st.columns(3, gap="medium")
-        with c1:
-            m_cs     = st.number_input("Class Standing (%)",     0.0, 100.0, key="og_m_cs")
-        with c2:
-            m_exam   = st.number_input("Midterm Exam Score (%)", 0.0, 100.0, key="og_m_ex")
-        with c3:
-            m_prelim = st.number_input("Prelim Grade (%)",       0.0, 100.0, key="og_m_pg")
-        st.markdown("<div class='formula-box'>partial = 0.5×cs + 0.5×exam<br>Midterm Grade = (2/3)×partial + (1/3)×Prelim Grade</div>", unsafe_allow_html=True)
-        ctx.update({"midterm_cs": m_cs, "midterm_exam": m_exam, "midterm_prelim": m_prelim})
-        st.markdown("</div>", unsafe_allow_html=True)
-        if st.button("Calculate Midterm Grade →", key="btn_og_m", use_container_width=True):
-            partial = 0.5 * m_cs + 0.5 * m_exam
-            show_grade_card((2/3) * partial + (1/3) * m_prelim, "Midterm Grade")
+        overall_midterm_panel()
 
     # FINAL
     with t3:
-        st.markdown("<span class='term-pill pill-green'>Final Term</span>", unsafe_allow_html=True)
-        st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
-        c1, c2, c3 = st.columns(3, gap="medium")
-        with c1:
-            f_cs      = st.number_input("Class Standing (%)",    0.0, 100.0, key="og_f_cs")
-        with c2:
-            f_exam    = st.number_input("Final Exam Score (%)",  0.0, 100.0, key="og_f_ex")
-        with c3:
-            f_midterm = st.number_input("Midterm Grade (%)",     0.0, 100.0, key="og_f_mg")
-        st.markdown("<div class='formula-box'>partial = 0.5×cs + 0.5×exam<br>Final Grade = (2/3)×partial + (1/3)×Midterm Grade</div>", unsafe_allow_html=True)
-        ctx.update({"final_cs": f_cs, "final_exam": f_exam, "final_midterm": f_midterm})
-        st.markdown("</div>", unsafe_allow_html=True)
-        if st.button("Calculate Final Grade →", key="btn_og_f", use_container_width=True):
-            partial = 0.5 * f_cs + 0.5 * f_exam
-            show_grade_card((2/3) * partial + (1/3) * f_midterm, "Final Grade")
+        overall_final_panel()
 
-    return ctx
+    # ROSTER
+    with t4:
+        overall_roster_panel()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # MODE 3 — CLASS STANDING
 # ══════════════════════════════════════════════════════════════════════════════
+def load_items(key, n):
+    """
+    Item arrays and running aggregate for one category, kept in the session
+    data and resized to n items.
+    """
+    items = session_data().items
+    if key not in items:
+        scores, totals = cs_model.empty_items(n)
+        items[key] = (scores, totals, cs_model.CategoryAggregate(scores, totals))
+    scores, totals, agg = items[key]
+    if len(scores) != n:
+        scores, totals = cs_model.resize_items(scores, totals, n)
+        items[key] = (scores, totals, agg)
+        agg.resize(n)
+    return scores, totals, agg
+
+
+def apply_item_edits(key):
+    """data_editor callback: fold edited cells into the arrays and running sums."""
+    entry = session_data().items.get(key)
+    if entry is None:
+        # The session expired from disk while the widget state survived.
+        return
+    scores, totals, agg = entry
+    for row, changes in st.session_state[f"{key}_items"]["edited_rows"].items():
+        row = int(row)
+        if row >= len(scores):
+            continue
+        score = max(changes.get("Score", scores[row]) or 0.0, 0.0)
+        total = changes.get("Total", totals[row]) or cs_model.DEFAULT_TOTAL
+        # edited_rows is cumulative; only rows whose values moved cost an update.
+        if score != scores[row] or total != totals[row]:
+            scores[row], totals[row] = score, total
+            agg.set_item(row, score, total)
+
+
+ITEM_COLUMNS = {
+    "Score":   st.column_config.NumberColumn("Score", min_value=0.0, format="%.1f"),
+    "Total":   st.column_config.NumberColumn("Total", min_value=1.0, format="%.1f"),
+    "Percent": st.column_config.NumberColumn("Percent", format="%.1f%%", disabled=True),
+}
+
+
 def calculate_class_standing():
     st.markdown("<p style='color:#5a6280;font-size:0.88rem;margin:-0.4rem 0 1.2rem;'>Check the categories you have, enter your scores, and set each weight.</p>", unsafe_allow_html=True)
 
-    categories     = ["Quiz", "Assignment", "Seatwork", "Activity", "Laboratory", "Homework", "Recitation"]
-    class_standing = 0.0
-    ctx            = {"mode": "Calculate Class Standing"}
+    averages, weights = [], []
+    ctx = {}
 
-    for cat in categories:
+    for cat in cs_model.CATEGORIES:
         key = cat.lower()
         has_cat = st.checkbox(f"Include {cat}s", key=f"chk_{key}")
         if has_cat:
             st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
             st.markdown(f"<div class='section-title'>📝 {cat}</div>", unsafe_allow_html=True)
 
-            num_items   = st.number_input(f"How many {cat}s?", min_value=1, step=1, key=f"{key}_count")
-            percentages = []
-
-            for i in range(int(num_items)):
-                c1, c2, c3 = st.columns([2, 2, 1], gap="small")
-                with c1:
-                    score = st.number_input(f"{cat} {i+1} — Score", min_value=0.0, key=f"{key}_score_{i}")
-                with c2:
-                    total = st.number_input(f"{cat} {i+1} — Total", min_value=1.0, value=100.0, key=f"{key}_total_{i}")
-                with c3:
-                    pct = calc_pct(score, total)
-                    st.metric(f"Item {i+1}", f"{pct:.1f}%")
-                percentages.append(pct)
-
-            overall  = sum(percentages) / len(percentages) if percentages else 0.0
+            num_items      = st.number_input(f"How many {cat}s?", min_value=1, step=1, key=f"{key}_count")
+            scores, totals, agg = load_items(key, int(num_items))
+            items = pd.DataFrame({
+                "Score":   scores,
+                "Total":   totals,
+                "Percent": agg.pcts,
+            }, index=pd.RangeIndex(1, len(scores) + 1, name=cat))
+            st.data_editor(items, key=f"{key}_items", column_config=ITEM_COLUMNS, num_rows="fixed",
+                           on_change=apply_item_edits, args=(key,), use_container_width=True)
+
+            if cs_model.DEBUG and not agg.verify(scores, totals):
+                st.warning(f"{cat}: running average drifted from a full recompute and was resynced.")
+            overall  = agg.average
             wt_col, _ = st.columns([1, 2])
             with wt_col:
                 pct_equiv = st.number_input(f"Weight for {cat} (%)", 0.0, 100.0, key=f"{key}_wt")
-            weighted        = overall * (pct_equiv / 100)
-            class_standing += weighted
+            weighted = overall * (pct_equiv / 100)
+            averages.append(overall)
+            weights.append(pct_equiv)
 
             m1, m2 = st.columns(2)
             m1.metric("Category Average",      f"{overall:.2f}%")
@@ -715,6 +784,7 @@ def calculate_class_standing():
             ctx[f"{key}_weight"] = pct_equiv
             st.markdown("</div>", unsafe_allow_html=True)
 
+    _, class_standing = cs_model.weighted_standing(averages, weights)
     ctx["total_class_standing"] = class_standing
 
     st.markdown(f"""
@@ -724,21 +794,178 @@ def calculate_class_standing():
     </div>""", unsafe_allow_html=True)
 
     if st.button("Finalize & Show Grade Equivalent →", use_container_width=True):
+        record_calc("standing", "standing", ctx, class_standing)
         show_grade_card(class_standing, "Class Standing")
 
-    return ctx
+    publish_ctx("Class Standing", "items", ctx)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# MODE 4 — ROSTER ANALYTICS
+# ══════════════════════════════════════════════════════════════════════════════
+def load_analytics_roster(upload):
+    """Columnar roster for the uploaded file, loaded once per upload."""
+    data = session_data()
+    if data.roster is None or data.roster[0] != upload.file_id:
+        data.roster = (upload.file_id, analytics.load_roster(upload, roster.roster_format(upload.name)))
+    return data.roster[1]
+
+
+def roster_analytics():
+    st.markdown("<p style='color:#5a6280;font-size:0.88rem;margin:-0.4rem 0 1.2rem;'>Load a section once, then curve exams or change weights and watch the grade distribution move.</p>", unsafe_allow_html=True)
+
+    st.markdown("<div class='gc-card'>", unsafe_allow_html=True)
+    types  = ["csv", "parquet"] if roster.parquet_available() else ["csv"]
+    upload = st.file_uploader("Roster file", type=types, key="ra_roster")
+    st.markdown("<div class='formula-box'>Columns: prelim_cs, prelim_exam, midterm_cs, midterm_exam, final_cs, final_exam<br>"
+                "(or a prelim_grade / midterm_grade column in place of an earlier term)</div>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+    if upload is None:
+        publish_ctx("Roster Analytics", "roster", {})
+        return
+
+    try:
+        model = load_analytics_roster(upload)
+    except roster.READ_ERRORS as exc:
+        st.error(f"Could not read {upload.name}: {exc}")
+        return
+    if not model.terms:
+        st.markdown("<div class='result-warn'>⚠️ No gradable term found — check the column names above.</div>", unsafe_allow_html=True)
+        return
+
+    c1, c2 = st.columns(2, gap="medium")
+    with c1:
+        term  = st.selectbox("Term", model.terms, index=len(model.terms) - 1, format_func=str.capitalize, key="ra_term")
+        curve = st.slider("Exam curve (points)", -10.0, 10.0, 0.0, 0.5, key="ra_curve")
+    with c2:
+        override  = st.checkbox("Override weights", key="ra_override")
+        cs_w      = st.slider("Class standing weight", 0.0, 1.0, POLICY.cs_w, 0.05, key="ra_cs_w", disabled=not override)
+        partial_w = st.slider("Current term weight (vs prior term)", 0.0, 1.0, POLICY.partial_w, 0.05,
+                              key="ra_partial_w", disabled=not override or term == "prelim")
+
+    t0   = time.perf_counter()
+    base = model.what_if(term)
+    res  = model.what_if(term, curve, cs_w if override else None, partial_w if override else None)
+    ms   = (time.perf_counter() - t0) * 1000
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Students",   f"{model.rows - res.missing:,}", f"{res.missing:,} incomplete" if res.missing else None,
+              delta_color="off")
+    if res.missing < model.rows:
+        m2.metric("Pass rate",  f"{res.pass_rate:.1%}", f"{(res.pass_rate - base.pass_rate) * 100:+.1f} pts")
+        m3.metric("Mean grade", f"{res.mean:.2f}%",     f"{res.mean - base.mean:+.2f}")
+    else:
+        m2.metric("Pass rate",  "—")
+        m3.metric("Mean grade", "—")
+
+    labels = [f"{p:.2f} {d}" for p, d in zip(POLICY.points, POLICY.descriptors)]
+    dist   = pd.DataFrame({"Current": base.counts, "What-if": res.counts}, index=labels)
+    st.bar_chart(dist.iloc[::-1], stack=False)
+
+    moves = model.band_moves(res)
+    if moves:
+        st.dataframe(pd.DataFrame(moves, columns=["From", "To", "Students"]).head(12),
+                     hide_index=True, use_container_width=True)
+    incomplete = f" {res.missing:,} with a blank score are left out of the pass rate, mean and bands." if res.missing else ""
+    st.caption(f"Recomputed {model.rows:,} students in {ms:.1f} ms.{incomplete}")
+
+    with st.expander("🎲 Pass probability (Monte Carlo)"):
+        pass_probability(model, upload.file_id)
+
+    publish_ctx("Roster Analytics", "roster", {
+        "roster_rows": model.rows, "term": term, "curve": curve,
+        "pass_rate": round(res.pass_rate, 4), "mean_grade": round(res.mean, 2), "incomplete": res.missing,
+    })
+
+
+MC_WORKERS = int(os.environ.get("GRADE_MC_WORKERS", "1"))
+
+
+@st.fragment
+def pass_probability(model, file_id):
+    st.markdown("<p style='font-size:0.78rem;color:#5a6280;margin:0 0 0.8rem;'>💡 Missing scores are sampled from a normal fitted to each student's known scores of the same kind; a recorded prelim_grade / midterm_grade is kept as is.</p>", unsafe_allow_html=True)
+    passing = [float(p) for p in POLICY.points[:0:-1]]
+    c1, c2, c3 = st.columns(3, gap="medium")
+    with c1:
+        goal  = st.selectbox("Final grade at or better than", passing, index=passing.index(2.0) if 2.0 in passing else 0,
+                             format_func="{:.2f}".format, key="mc_goal")
+    with c2:
+        draws = st.select_slider("Draws per student", [10_000, 100_000, 1_000_000], 100_000, key="mc_draws")
+    with c3:
+        seed  = st.number_input("Seed", 0, step=1, value=0, key="mc_seed")
+    # rows × draws can run for minutes, so the simulation runs on the background pool.
+    # Only the running job sits in st.session_state; its result moves to the session
+    # data (which the session manager can spill) as soon as it is done.
+    data   = session_data()
+    job    = st.session_state.get("mc_job")
+    params = (file_id, draws, int(seed))
+    if st.button("Run Simulation →", key="btn_mc", use_container_width=True,
+                 disabled=job is not None and not job.finished()):
+        job = montecarlo.submit_section(get_export_pool(), model.columns, model.rows, draws, int(seed),
+                                        MC_WORKERS, params=params)
+        st.session_state.mc_job = job
+    if job is not None and job.finished():
+        del st.session_state.mc_job
+        try:
+            data.simulation = (job.params, job.result(), job.seconds)
+        except Exception as exc:
+            data.simulation = None
+            st.markdown(f"<div class='result-warn'>⚠️ Simulation failed: {exc}</div>", unsafe_allow_html=True)
+            return
+    elif job is not None and job.params == params:
+        simulation_progress()
+        return
+    if data.simulation is None or data.simulation[0] != params:
+        return
+
+    _, probs, seconds = data.simulation
+    reach    = montecarlo.at_or_better(probs, goal)
+    passed   = 1 - probs[:, 0]
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric(f"Expected at {goal:.2f} or better", f"{reach.sum():,.1f}")
+    m2.metric("Expected to pass",                  f"{passed.sum():,.1f}")
+    m3.metric("Below 50% chance to pass",          f"{int((passed < 0.5).sum()):,}")
+    hist, edges = np.histogram(reach, bins=10, range=(0, 1))
+    st.bar_chart(pd.DataFrame({"Students": hist}, index=[f"{a:.0%}–{b:.0%}" for a, b in zip(edges[:-1], edges[1:])]))
+    risk = np.argsort(passed)[:15]
+    st.dataframe(pd.DataFrame({"Row": risk + 1, "P(pass)": passed[risk], f"P(≤ {goal:.2f})": reach[risk]}),
+                 hide_index=True, use_container_width=True)
+    st.caption(f"{model.rows:,} students × {draws:,} draws in {seconds * 1000:,.0f} ms.")
+
+
+@st.fragment(run_every=0.5)
+def simulation_progress():
+    job = st.session_state.mc_job
+    st.progress(job.fraction, text=f"Simulating… {job.done:,} / {job.total:,} students")
+    if job.finished():
+        st.rerun()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # MAIN
 # ══════════════════════════════════════════════════════════════════════════════
 def main():
-    client = get_groq_client()
+    # The session stays pinned (never spilled) until the run ends.
+    manager = get_session_manager()
+    manager.acquire(st.session_state.sid)
+    try:
+        page()
+    finally:
+        # Also on st.rerun() from a finished job, which ends the run with an exception.
+        manager.release(st.session_state.sid)
+        finish_timer(RUN_TIMER)
+
+
+def page():
+    backend = get_assistant_backend()
+    cache   = get_response_cache()
 
     titles = {
         "Predict Exam Score": ("🔮", "Predict Exam Score"),
         "Calculate Grade":    ("📊", "Calculate Overall Grade"),
         "Class Standing":     ("📋", "Class Standing"),
+        "Roster Analytics":   ("📈", "Roster Analytics"),
     }
     icon, title = titles[mode_key]
     st.markdown(f"""
@@ -749,12 +976,16 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
-    if mode_key == "Predict Exam Score":
-        ctx = predict_major_exam_grade()
-    elif mode_key == "Calculate Grade":
-        ctx = calculate_overall_grade()
-    else:
-        ctx = calculate_class_standing()
+    with RUN_TIMER.phase(f"mode:{mode_key}"):
+        if mode_key == "Predict Exam Score":
+            predict_major_exam_grade()
+        elif mode_key == "Calculate Grade":
+            calculate_overall_grade()
+        elif mode_key == "Roster Analytics":
+            roster_analytics()
+        else:
+            calculate_class_standing()
+        show_history()
 
     # ── AI Chat ──────────────────────────────────────────────────────────────
     st.markdown("<hr class='gc-divider'>", unsafe_allow_html=True)
@@ -769,47 +1000,85 @@ def main():
         </div>
     </div>""", unsafe_allow_html=True)
 
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    chat_panel(backend, cache)
+
+
+def finish_timer(timer):
+    if timer.finish() and st.query_params.get("profile") == "cprofile":
+        # Profile a single rerun only; keep timing the following ones.
+        st.query_params["profile"] = "1"
+
 
-    for m in st.session_state.messages:
-        with st.chat_message(m["role"]):
-            st.markdown(m["content"])
+@st.fragment
+def chat_panel(backend, cache):
+    # A fragment rerun skips the top of the script, so it times itself.
+    own_run = instrumentation.current() is instrumentation.NULL_TIMER
+    timer   = instrumentation.start("fragment:chat", mode_key, st.query_params.get("profile")) if own_run else instrumentation.current()
+    if not own_run:
+        chat_body(backend, cache, timer)
+        return
+    manager = get_session_manager()
+    manager.acquire(st.session_state.sid)
+    try:
+        chat_body(backend, cache, timer)
+    finally:
+        manager.release(st.session_state.sid)
+        finish_timer(timer)
 
-    ctx_text = "\n".join(f"{k} = {v}" for k, v in ctx.items())
+
+def chat_body(backend, cache, timer):
+    history = session_data().chat
+    if "llm_calls_avoided" not in st.session_state:
+        st.session_state.llm_calls_avoided = 0
+    if "prompt_tokens" not in st.session_state:
+        st.session_state.prompt_tokens = 0
+
+    with timer.phase("history"):
+        for m in history:
+            with st.chat_message(m["role"]):
+                st.markdown(m["content"])
+
+    ctx_text = "\n".join(f"{k} = {v}" for k, v in current_ctx(mode_key).items())
 
     if prompt := st.chat_input("Ask about formulas, predictions, or your grades…"):
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        history.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
             sys_p = build_system_prompt(mode_key, ctx_text)
-            msgs  = [
-                {"role": "system", "content": sys_p},
-                {"role": "user",   "content": f"Current UI context:\n{ctx_text}"},
-                *st.session_state.messages,
-            ]
-            stream = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=msgs,
-                temperature=0.1,
-                stream=True,
-            )
-            full, placeholder = "", st.empty()
-            for chunk in stream:
-                full += chunk.choices[0].delta.content or ""
-                placeholder.markdown(full + "▌")
-            placeholder.markdown(full)
-            st.session_state.messages.append({"role": "assistant", "content": full})
+            placeholder = st.empty()
+            full = chat_intents.answer(prompt)
+            if full is not None:
+                st.session_state.llm_calls_avoided += 1
+            else:
+                key  = cache_key(sys_p, ctx_text, history)
+                full = cache.get(key)
+            if full is None:
+                # The UI context is already part of the system prompt.
+                msgs, st.session_state.prompt_tokens = build_messages(sys_p, history)
+                try:
+                    with timer.phase("llm"):
+                        full = render_stream(placeholder, timer.track_tokens(backend.stream(msgs)))
+                    cache.put(key, full)
+                except (BackendBusy, BackendUnavailable, TimeoutError) as exc:
+                    full = f"⚠️ {exc}"
+                    placeholder.markdown(full)
+            else:
+                placeholder.markdown(full)
+            history.append({"role": "assistant", "content": full})
 
     c1, c2 = st.columns([1, 3])
     with c1:
         if st.button("🗑️ Clear chat", use_container_width=True):
-            st.session_state.messages = []
-            st.rerun()
+            history.clear()
+            st.rerun(scope="fragment")
     with c2:
-        st.caption("Clears all messages and starts a fresh conversation.")
+        cstats = cache.stats()
+        st.caption(f"Clears all messages and starts a fresh conversation. · Answer cache: {cstats['hits']} hits / {cstats['misses']} misses · "
+                   f"Answered locally: {st.session_state.llm_calls_avoided} · "
+                   f"Last prompt: ~{st.session_state.prompt_tokens} tokens · "
+                   f"Session: {get_session_manager().session_bytes(st.session_state.sid) / 1024:.1f} kB")
 
 
 if __name__ == "__main__":
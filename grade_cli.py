@@ -0,0 +1,65 @@
+"""Headless roster grader.
+
+    python -m grade_cli roster.csv -o graded.csv --workers 4 --stats
+    cat roster.csv | python -m grade_cli > graded.csv
+
+With --workers > 1 and a file path, the roster is split into shards that are
+read and graded in a process pool, then merged in the original row order.
+
+Imports only the grading core, never streamlit or groq, so it starts fast
+enough for cron jobs.
+"""
+import argparse
+import io
+import sys
+import time
+
+import roster
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="grade_cli", description="Grade a roster file without starting Streamlit.")
+    parser.add_argument("input", nargs="?", default="-", help="roster CSV/Parquet path, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="output path, or - for stdout (default)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="roster format (default: from input file name, else csv)")
+    parser.add_argument("--chunksize", type=int, default=roster.DEFAULT_CHUNKSIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1, help="grading processes (default: %(default)s)")
+    parser.add_argument("--shard-mb", type=float, default=roster.DEFAULT_SHARD_BYTES / 2**20,
+                        help="CSV shard size in MiB for parallel grading (default: %(default)s)")
+    parser.add_argument("--exact", action="store_true", default=None,
+                        help="grade in exact fixed-point arithmetic with the policy's rounding rule (default: GRADE_ARITHMETIC)")
+    parser.add_argument("--stats", action="store_true", help="print per-shard timings to stderr")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt  = args.format or (roster.roster_format(args.input) if args.input != "-" else "csv")
+
+    if args.input == "-":
+        src = sys.stdin.buffer if fmt == "csv" else io.BytesIO(sys.stdin.buffer.read())
+    else:
+        src = args.input
+
+    dst = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    stats, t0 = [], time.perf_counter()
+    try:
+        if args.workers > 1 and args.input != "-":
+            rows = roster.grade_file_parallel(src, dst, fmt, workers=args.workers,
+                                              shard_bytes=int(args.shard_mb * 2**20), stats=stats, exact=args.exact)
+        else:
+            rows = roster.grade_file(src, dst, fmt, chunksize=args.chunksize, workers=args.workers, exact=args.exact)
+    except roster.READ_ERRORS as exc:
+        print(f"grade_cli: cannot read roster: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if dst is not sys.stdout.buffer:
+            dst.close()
+    if args.stats and stats:
+        print(roster.format_stats(stats, time.perf_counter() - t0), file=sys.stderr)
+    print(f"graded {rows} rows", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""Persistent per-student grade history.
+
+Every calculation the app makes for an identified student (prelim, midterm,
+final, class standing) is appended to a local SQLite file keyed by
+student/section/term. Indexes cover the advising queries — a student's history,
+and a section filtered by term and grade or point band — so each is an index
+range scan.
+
+Writes never touch the disk on the caller's thread: ``record`` only queues the
+row, and a background writer commits queued rows in batches (one transaction,
+one WAL sync per batch). A batch that hits an SQLite error (a locked database,
+say) is rolled back and retried a few times, then dropped and logged; the
+writer keeps running either way, so the queue and ``flush`` never stall.
+
+    python -m grade_store student 2021-00123
+    python -m grade_store section BSIT-2A --term final --points 1.0 2.0
+    python -m grade_store section BSIT-2A --term final --kind predict
+
+Predictions ("predict") are stored without a grade; their target percentage is
+kept in ``inputs``. Section queries return only recorded grades ("grade" and
+"standing") by default.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_DB_PATH     = os.path.join(os.path.expanduser("~"), ".cache", "grade_calcu", "grades.sqlite3")
+DEFAULT_BATCH_SIZE  = 256
+DEFAULT_FLUSH_DELAY = 0.5
+WRITE_RETRIES       = 3
+RETRY_DELAY         = 0.2       # doubled after every failed attempt
+TERMS               = ("prelim", "midterm", "final", "standing")
+KINDS               = ("grade", "predict", "standing")
+GRADED              = ("grade", "standing")     # kinds whose grade column is an actual grade
+COLUMNS             = ("id", "student", "section", "term", "kind", "recorded_at", "grade", "points", "inputs")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id          INTEGER PRIMARY KEY,
+    student     TEXT NOT NULL,
+    section     TEXT NOT NULL DEFAULT '',
+    term        TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    grade       REAL,
+    points      REAL,
+    inputs      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_student ON records(student, term, recorded_at);
+CREATE INDEX IF NOT EXISTS records_section_grade  ON records(section, term, grade);
+CREATE INDEX IF NOT EXISTS records_section_points ON records(section, term, points);
+"""
+
+_STOP = object()
+log   = logging.getLogger(__name__)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class GradeStore:
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=DEFAULT_BATCH_SIZE, flush_delay=DEFAULT_FLUSH_DELAY):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path        = path
+        self.batch_size  = batch_size
+        self.flush_delay = flush_delay
+        self.written     = 0
+        self.batches     = 0
+        self.dropped     = 0
+        self.last_error  = None
+        self._conn       = _connect(path)
+        self._lock       = threading.Lock()
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+        self._queue  = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="grade-store-writer", daemon=True)
+        self._writer.start()
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+    def record(self, student, term, kind, inputs, grade=None, points=None, section=""):
+        """Queue one calculation; returns immediately."""
+        self._queue.put((str(student).strip(), str(section).strip(), term, kind, time.time(),
+                         None if grade is None else float(grade), None if points is None else float(points),
+                         json.dumps(inputs, sort_keys=True, default=float)))
+
+    def _write_loop(self):
+        conn = _connect(self.path)   # the writer thread's own connection
+        stop = False
+        while not stop:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_delay
+            while len(rows) < self.batch_size and rows[-1] is not _STOP:
+                try:
+                    rows.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            if rows[-1] is _STOP:
+                rows.pop()
+                stop = True
+            try:
+                if rows:
+                    self._write_batch(conn, rows)
+            finally:
+                for _ in range(len(rows) + stop):
+                    self._queue.task_done()
+        conn.close()
+
+    def _write_batch(self, conn, rows):
+        delay = RETRY_DELAY
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                conn.execute("BEGIN")
+                conn.executemany("""INSERT INTO records (student, section, term, kind, recorded_at, grade, points, inputs)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+                conn.execute("COMMIT")
+            except sqlite3.Error as exc:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                self.last_error = exc
+                if attempt == WRITE_RETRIES:
+                    self.dropped += len(rows)
+                    log.error("grade store: dropped %d records after %d attempts: %s", len(rows), attempt, exc)
+                    return
+                time.sleep(delay)
+                delay *= 2
+            else:
+                self.written += len(rows)
+                self.batches += 1
+                return
+
+    def flush(self):
+        """Block until every queued record is committed."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+    def _query(self, where, params, limit):
+        sql = f"SELECT {', '.join(COLUMNS)} FROM records WHERE {' AND '.join(where)} ORDER BY recorded_at"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, r), inputs=json.loads(r[-1])) for r in rows]
+
+    @staticmethod
+    def _kind_filter(where, params, kind):
+        """Restrict to one kind or a tuple of kinds; None keeps every kind."""
+        if kind:
+            kinds = (kind,) if isinstance(kind, str) else tuple(kind)
+            where.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+
+    def by_student(self, student, term=None, limit=None, kind=None):
+        """A student's calculations, oldest first."""
+        where, params = ["student = ?"], [str(student).strip()]
+        if term:
+            where.append("term = ?")
+            params.append(term)
+        self._kind_filter(where, params, kind)
+        return self._query(where, params, limit)
+
+    def by_section(self, section, term, min_grade=None, max_grade=None, min_points=None, max_points=None, limit=None,
+                   kind=GRADED):
+        """
+        A section's recorded grades for one term (other kinds via ``kind``; None
+        for all), optionally restricted to a grade range (%) and/or a point-grade
+        band (inclusive).
+        """
+        where, params = ["section = ?", "term = ?"], [str(section).strip(), term]
+        self._kind_filter(where, params, kind)
+        for col, op, value in (("grade", ">=", min_grade), ("grade", "<=", max_grade),
+                               ("points", ">=", min_points), ("points", "<=", max_points)):
+            if value is not None:
+                where.append(f"{col} {op} ?")
+                params.append(float(value))
+        return self._query(where, params, limit)
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        return {"rows": rows, "queued": self._queue.qsize(), "written": self.written, "batches": self.batches,
+                "dropped": self.dropped}
+
+
+def make_store(path=None):
+    """Open the store at GRADE_STORE_PATH (default ~/.cache/grade_calcu/grades.sqlite3)."""
+    return GradeStore(path or os.environ.get("GRADE_STORE_PATH", DEFAULT_DB_PATH))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the persistent grade history.")
+    parser.add_argument("--db", help="store path (default: GRADE_STORE_PATH or ~/.cache/grade_calcu/grades.sqlite3)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_student = sub.add_parser("student", help="history of one student")
+    p_student.add_argument("student")
+    p_student.add_argument("--term", choices=TERMS)
+    p_student.add_argument("--kind", choices=KINDS, help="only this kind of calculation (default: all)")
+    p_section = sub.add_parser("section", help="a section's records for one term")
+    p_section.add_argument("section")
+    p_section.add_argument("--term", choices=TERMS, required=True)
+    p_section.add_argument("--grade", nargs=2, type=float, metavar=("MIN", "MAX"), help="grade range (%%)")
+    p_section.add_argument("--points", nargs=2, type=float, metavar=("BEST", "WORST"), help="point-grade band, e.g. 1.0 2.0")
+    p_section.add_argument("--kind", choices=KINDS + ("all",),
+                           help="only this kind of calculation (default: grade and standing)")
+    args = parser.parse_args(argv)
+
+    store = make_store(args.db)
+    if args.cmd == "student":
+        rows = store.by_student(args.student, args.term, kind=args.kind)
+    else:
+        grade  = args.grade or (None, None)
+        points = sorted(args.points) if args.points else (None, None)
+        kind   = {None: GRADED, "all": None}.get(args.kind, args.kind)
+        rows = store.by_section(args.section, args.term, grade[0], grade[1], points[0], points[1], kind=kind)
+    store.close()
+    for r in rows:
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["recorded_at"]))
+        grade = "" if r["grade"] is None else f"{r['grade']:.2f}%"
+        pts   = "" if r["points"] is None else f"{r['points']:.2f}"
+        print(f"{stamp}  {r['student']:14} {r['section']:10} {r['term']:9} {r['kind']:8} {grade:>8} {pts:>5}  {json.dumps(r['inputs'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
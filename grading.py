@@ -0,0 +1,162 @@
+"""UI-independent grading core.
+
+Every function here accepts scalars or NumPy arrays (anything ``np.asarray``
+understands, including pandas columns) and grades a whole roster in one
+vectorized pass. ``grading_scheme`` is the per-student wrapper used by the app.
+Bands and weights come from the compiled grading policy (see policy.py); each
+function takes an optional ``policy`` and defaults to ``POLICY``.
+
+Term grades can also be computed in exact fixed-point arithmetic (see
+fixed_point.py): pass ``exact=True`` or set ``GRADE_ARITHMETIC=exact`` to make
+it the default.
+"""
+import os
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+import fixed_point
+from policy import load_policy
+
+POLICY = load_policy(os.environ.get("GRADE_POLICY"))
+EXACT  = os.environ.get("GRADE_ARITHMETIC", "float") == "exact"
+
+
+# ── Grading bands ──────────────────────────────────────────────────────────────
+def band_index(pct, policy=None):
+    """Return the band index (0 = failing … n = best) for each percentage."""
+    policy = policy or POLICY
+    pct = np.asarray(pct, dtype=float)
+    idx = np.searchsorted(policy.cutoffs, pct, side="right")
+    # Above the maximum (and NaN, which sorts last) falls through to failing.
+    return np.where(pct <= policy.max_pct, idx, 0)
+
+
+def grade_bands(pct, policy=None):
+    """Vectorized grading scheme: return (points, descriptors) arrays."""
+    policy = policy or POLICY
+    idx = band_index(pct, policy)
+    return policy.points[idx], policy.descriptors[idx]
+
+
+@lru_cache(maxsize=8)
+def _scalar_bands(policy):
+    """The policy's cutoffs and (points, descriptor) pairs as plain Python lists."""
+    return (policy.cutoffs.tolist(), policy.max_pct,
+            [(float(p), str(d)) for p, d in zip(policy.points, policy.descriptors)])
+
+
+def grading_scheme(pct, policy=None):
+    """(points, descriptor) for one percentage: a bisect over the same cutoffs as ``band_index``."""
+    cutoffs, max_pct, bands = _scalar_bands(policy or POLICY)
+    if not pct <= max_pct:      # above the maximum, or NaN
+        return bands[0]
+    return bands[bisect_right(cutoffs, pct)]
+
+
+def calc_pct(score, total):
+    return (score / total * 100) if total > 0 else 0
+
+# Convert a point grade (1.00–5.00 by default) to its minimum percentage equivalent
+POINT_TO_PCT = POLICY.point_to_pct
+
+@lru_cache(maxsize=8)
+def _point_range(policy):
+    return float(policy.points.min()), float(policy.points.max())
+
+def is_point_grade(val, policy=None):
+    """Return True if value lies on the policy's point scale (1.00–5.00 by default)."""
+    lo, hi = _point_range(policy or POLICY)
+    return lo <= val <= hi
+
+def resolve_desired(val, policy=None):
+    """
+    If val lies on the policy's point scale (1.00–5.00 by default), convert to
+    its pct equivalent; anything else is already a percentage. That includes
+    0 < val < 1 on the default scale: it is a percentage, no longer snapped up
+    to the nearest point grade (0.5 used to become 1.00, i.e. 99%).
+    Returns (resolved_pct, was_converted, point_val)
+    """
+    if not is_point_grade(val, policy):
+        return val, False, None
+    point_to_pct = POINT_TO_PCT if policy is None else policy.point_to_pct
+    # round to nearest known point grade
+    closest = min(point_to_pct.keys(), key=lambda k: abs(k - val))
+    return point_to_pct[closest], True, closest
+
+
+# ── Term formulas ──────────────────────────────────────────────────────────────
+def prelim_grade(cs, exam, policy=None, exact=None):
+    """Prelim = cs_w*cs + exam_w*exam (0.5/0.5 by default)."""
+    policy = policy or POLICY
+    if EXACT if exact is None else exact:
+        return fixed_point.term_grade(cs, exam, None, policy)
+    return policy.cs_w * np.asarray(cs, dtype=float) + policy.exam_w * np.asarray(exam, dtype=float)
+
+
+def term_grade(cs, exam, prior, policy=None, exact=None):
+    """Midterm/Final = partial_w*partial + prior_w*prior_term_grade (2/3, 1/3 by default)."""
+    policy  = policy or POLICY
+    if EXACT if exact is None else exact:
+        return fixed_point.term_grade(cs, exam, prior, policy)
+    partial = prelim_grade(cs, exam, policy)
+    return policy.partial_w * partial + policy.prior_w * np.asarray(prior, dtype=float)
+
+
+def needed_exam_pct(desired, cs, prior=None, policy=None):
+    """Exam percentage required to reach ``desired``; prior=None means Prelim."""
+    policy  = policy or POLICY
+    desired = np.asarray(desired, dtype=float)
+    cs      = np.asarray(cs, dtype=float)
+    if prior is None:
+        partial_needed = desired
+    else:
+        partial_needed = (desired - policy.prior_w * np.asarray(prior, dtype=float)) / policy.partial_w
+    return (partial_needed - policy.cs_w * cs) / policy.exam_w
+
+
+def grade_roster(cs, exam, prior=None, policy=None, exact=None):
+    """
+    Grade a whole section in one pass.
+    prior=None grades a Prelim; otherwise prior holds the previous term grades.
+    Returns (term_grades, points, descriptors) as arrays.
+    """
+    if EXACT if exact is None else exact:
+        return fixed_point.grade_roster(cs, exam, prior, policy or POLICY)
+    grades = prelim_grade(cs, exam, policy) if prior is None else term_grade(cs, exam, prior, policy)
+    points, descriptors = grade_bands(grades, policy)
+    return grades, points, descriptors
+
+
+# ── Requirements matrix ────────────────────────────────────────────────────────
+CS_GRID    = np.arange(50.0, 100.1, 5.0)
+PRIOR_GRID = np.arange(50.0, 100.1, 1.0)
+
+
+def requirement_matrix(targets, cs_grid, prior_grid=None, policy=None):
+    """
+    Exam percentage needed for every target × class standing (× prior grade)
+    in one broadcast. Shape (targets, cs) for Prelim, (targets, cs, prior) otherwise.
+    """
+    targets = np.asarray(targets, dtype=float)[:, None]
+    cs      = np.asarray(cs_grid, dtype=float)[None, :]
+    if prior_grid is None:
+        return needed_exam_pct(targets, cs, None, policy)
+    prior = np.asarray(prior_grid, dtype=float)[None, None, :]
+    return needed_exam_pct(targets[..., None], cs[..., None], prior, policy)
+
+
+@lru_cache(maxsize=32)
+def requirement_table(term, noq, policy=None):
+    """
+    Memoized requirements for every passing point grade over CS_GRID (and
+    PRIOR_GRID for Midterm/Final). Returns (points, needed_pct, needed_score).
+    """
+    policy  = policy or POLICY
+    table   = policy.point_to_pct
+    points  = np.array([p for p in table if p != policy.points[0]])
+    targets = np.array([table[p] for p in points])
+    needed  = requirement_matrix(targets, CS_GRID, None if term == "prelim" else PRIOR_GRID, policy)
+    needed.flags.writeable = False
+    return points, needed, needed * (noq / 100)
@@ -0,0 +1,173 @@
+"""Opt-in per-rerun timing and profiling.
+
+Enable with ``GRADE_PROFILE=1`` or the hidden ``?profile=1`` query parameter;
+``?profile=cprofile`` (or ``GRADE_PROFILE=cprofile``) additionally dumps a
+cProfile of one rerun. Each timed run appends one JSON line to
+``GRADE_METRICS_LOG`` and rewrites Prometheus text-format totals to
+``GRADE_METRICS_PROM`` (suitable for node_exporter's textfile collector).
+When profiling is off every call here is a no-op.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+METRICS_DIR = os.environ.get("GRADE_METRICS_DIR", os.path.join(os.path.expanduser("~"), ".cache", "grade_calcu"))
+LOG_PATH    = os.environ.get("GRADE_METRICS_LOG", os.path.join(METRICS_DIR, "metrics.jsonl"))
+PROM_PATH   = os.environ.get("GRADE_METRICS_PROM", os.path.join(METRICS_DIR, "metrics.prom"))
+
+_local = threading.local()
+_lock  = threading.Lock()
+# Process-wide totals behind the Prometheus export.
+_phase_seconds = defaultdict(float)
+_phase_count   = defaultdict(int)
+_chat          = {"ttft_seconds_sum": 0.0, "ttft_count": 0, "tokens_total": 0, "stream_seconds_sum": 0.0}
+
+
+class RunTimer:
+    def __init__(self, kind, mode="", profile=False):
+        self.kind     = kind
+        self.mode     = mode
+        self.phases   = {}
+        self.chat     = None
+        self.started  = time.perf_counter()
+        self.profiler = cProfile.Profile() if profile else None
+        if self.profiler:
+            try:
+                self.profiler.enable()
+            except ValueError:  # another profiler is active; Python 3.12+ allows one at a time
+                self.profiler = None
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t0
+
+    def track_tokens(self, tokens):
+        """Wrap a token stream to record time-to-first-token and tokens/second."""
+        t0, first, count = time.perf_counter(), None, 0
+        try:
+            for token in tokens:
+                if first is None:
+                    first = time.perf_counter() - t0
+                count += 1
+                yield token
+        finally:
+            seconds   = time.perf_counter() - t0
+            self.chat = {"ttft": first, "tokens": count, "seconds": seconds,
+                         "tokens_per_s": count / seconds if seconds else 0.0}
+
+    def finish(self):
+        """Record this run; returns the cProfile dump path when profiling."""
+        total = time.perf_counter() - self.started
+        dump  = None
+        try:
+            if self.profiler:
+                self.profiler.disable()
+                os.makedirs(METRICS_DIR, exist_ok=True)
+                dump = os.path.join(METRICS_DIR, f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+                self.profiler.dump_stats(dump)
+            record = {"ts": time.time(), "kind": self.kind, "mode": self.mode, "total": total,
+                      "phases": self.phases, "chat": self.chat, "profile": dump}
+            _record(record)
+        finally:
+            self.abandon()
+        return dump
+
+    def abandon(self):
+        """Stop profiling and detach from the thread without recording."""
+        if self.profiler:
+            self.profiler.disable()
+            self.profiler = None
+        _local.timer = None
+
+
+class _NullTimer:
+    """Stand-in used when instrumentation is off."""
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def track_tokens(self, tokens):
+        return tokens
+
+    def finish(self):
+        return None
+
+
+NULL_TIMER = _NullTimer()
+
+
+def start(kind, mode="", setting=None):
+    """
+    Begin timing a script run. ``setting`` is the query-parameter value; the
+    GRADE_PROFILE environment variable applies when it is empty.
+    """
+    stale = getattr(_local, "timer", None)
+    if stale is not None:       # a run on this thread that ended without finish()
+        stale.abandon()
+    setting = (setting or os.environ.get("GRADE_PROFILE", "")).lower()
+    if setting in ("", "0", "off", "false"):
+        return NULL_TIMER
+    timer = RunTimer(kind, mode, profile=setting == "cprofile")
+    _local.timer = timer
+    return timer
+
+
+def current():
+    """The timer of the script run executing on this thread, if any."""
+    return getattr(_local, "timer", None) or NULL_TIMER
+
+
+def _record(record):
+    with _lock:
+        for name, seconds in record["phases"].items():
+            _phase_seconds[name] += seconds
+            _phase_count[name]   += 1
+        _phase_seconds["total"] += record["total"]
+        _phase_count["total"]   += 1
+        chat = record["chat"]
+        if chat:
+            _chat["tokens_total"]       += chat["tokens"]
+            _chat["stream_seconds_sum"] += chat["seconds"]
+            if chat["ttft"] is not None:
+                _chat["ttft_seconds_sum"] += chat["ttft"]
+                _chat["ttft_count"]       += 1
+        os.makedirs(os.path.dirname(os.path.abspath(LOG_PATH)), exist_ok=True)
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        _write_prometheus()
+
+
+def prometheus_text():
+    lines = ["# HELP grade_rerun_phase_seconds Time spent per rerun phase.",
+             "# TYPE grade_rerun_phase_seconds summary"]
+    for name in sorted(_phase_seconds):
+        lines.append(f'grade_rerun_phase_seconds_sum{{phase="{name}"}} {_phase_seconds[name]:.6f}')
+        lines.append(f'grade_rerun_phase_seconds_count{{phase="{name}"}} {_phase_count[name]}')
+    lines += ["# HELP grade_chat_ttft_seconds Time to first streamed token.",
+              "# TYPE grade_chat_ttft_seconds summary",
+              f"grade_chat_ttft_seconds_sum {_chat['ttft_seconds_sum']:.6f}",
+              f"grade_chat_ttft_seconds_count {_chat['ttft_count']}",
+              "# HELP grade_chat_tokens_total Streamed assistant tokens.",
+              "# TYPE grade_chat_tokens_total counter",
+              f"grade_chat_tokens_total {_chat['tokens_total']}",
+              "# HELP grade_chat_stream_seconds_total Time spent streaming assistant replies.",
+              "# TYPE grade_chat_stream_seconds_total counter",
+              f"grade_chat_stream_seconds_total {_chat['stream_seconds_sum']:.6f}"]
+    return "\n".join(lines) + "\n"
+
+
+def _write_prometheus():
+    os.makedirs(os.path.dirname(os.path.abspath(PROM_PATH)), exist_ok=True)
+    tmp = f"{PROM_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, PROM_PATH)
@@ -0,0 +1,444 @@
+"""Concurrent-user load test for grade_calcu.py.
+
+    python loadtest.py                                  # 1, 5, 10 and 25 sessions
+    python loadtest.py --sessions 10 50 --latency 0.05  # slower fake tokens
+    python loadtest.py --json load.json                 # keep the numbers
+    python loadtest.py --driver apptest                 # per-process sessions
+
+Every simulated student walks all three calculator modes, pressing every
+Calculate button, and sends chat prompts that are answered by a local fake
+streaming server (fake_llm.py) standing in for Groq. Prompts are unique per
+session and turn, so they miss the answer cache and local intents and always
+stream.
+
+The default driver starts one ``streamlit run`` server and connects N
+simulated browser tabs to it over Streamlit's websocket protocol, all from one
+asyncio loop here: every session shares the server's script threads, cached
+resources, session manager and GIL, so the numbers include contention between
+sessions. Peak memory is the server process's RSS (Linux).
+
+``--driver apptest`` runs every session as a headless AppTest in its own
+process instead (AppTest installs a process-global mock runtime, so sessions
+cannot share one). It needs no server, but each process has its own cached
+resources and GIL, so it measures per-process cost, not one server under
+load; its peak memory is the driver's RSS plus every session's private
+memory and errs high.
+
+Per concurrency level the report shows the first page load, rerun latency
+(button clicks and mode switches, as seen by the client), chat-turn latency,
+time-to-first-token (from the app's own instrumentation) and peak memory.
+"""
+import asyncio
+import argparse
+import json
+import multiprocessing as mp
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+APP    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grade_calcu.py")
+LEVELS = (1, 5, 10, 25)
+DRIVERS = {"server": "one streamlit server, N websocket sessions",
+           "apptest": "per-process AppTest sessions, no shared server"}
+
+
+def rss_bytes(pid="self"):
+    """Resident set size of a process (Linux /proc); elsewhere this process's peak RSS, or 0."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if pid != "self":
+            return 0
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def private_bytes(pid):
+    """Memory a process does not share with its parent (0 when unavailable)."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            return sum(int(line.split()[1]) * 1024 for line in f if line.startswith(("Private_Clean", "Private_Dirty")))
+    except OSError:
+        return 0
+
+
+class MemorySampler(threading.Thread):
+    """Peak of ``sample()`` (bytes), polled every ``interval`` seconds."""
+
+    def __init__(self, sample, interval=0.05):
+        super().__init__(daemon=True)
+        self.sample   = sample
+        self.interval = interval
+        self.peak     = sample()
+        self._done    = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, self.sample())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+# ── One simulated student: a websocket session on the shared server ────────────
+class BrowserTab:
+    """
+    A minimal Streamlit client. Like the browser, every rerun request carries
+    the current widget values; deltas are read until the run finishes, and
+    widget ids and their fragments are kept: by key, else buttons by label and
+    other widgets by element type.
+    """
+
+    def __init__(self, ws):
+        self.ws        = ws
+        self.ids       = {}         # widget key, "label:<button label>" or element type → widget id
+        self.fragments = {}         # widget id → id of the fragment it belongs to
+        self.values    = {}         # widget id → WidgetState sent with every rerun
+        self.errors    = []
+
+    def set(self, key, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        wid = self.ids[key]
+        self.values[wid] = WidgetState(id=wid, **value)
+
+    async def rerun(self, trigger=None):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        msg    = BackMsg()
+        client = msg.rerun_script
+        client.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            client.widget_states.widgets.append(trigger)
+            client.fragment_id = self.fragments.get(trigger.id, "")
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._element(fwd.delta.new_element, fwd.delta.fragment_id)
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+
+    def _element(self, element, fragment):
+        kind = element.WhichOneof("type")
+        body = getattr(element, kind)
+        if kind == "exception":
+            self.errors.append(f"{body.type}: {body.message}")
+            return
+        wid = getattr(body, "id", "")
+        if not wid.startswith("$$ID-"):
+            return
+        key = wid.split("-", 2)[2]
+        if key == "None":
+            key = f"label:{body.label}" if kind == "button" else kind
+        self.ids[key] = wid
+        if fragment:
+            self.fragments[wid] = fragment
+
+    async def click(self, key):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        await self.rerun(WidgetState(id=self.ids[key], trigger_value=True))
+
+    async def chat(self, prompt):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        trigger = WidgetState(id=self.ids["chat_input"])
+        trigger.chat_input_value.data = prompt
+        await self.rerun(trigger)
+
+
+async def walk_server_session(url, sid, turns, think, timeout):
+    """One tab on the shared server; returns (load, reruns, chats, errors) samples."""
+    import websockets
+
+    load, reruns, chats, errors = [], [], [], []
+
+    async def timed(samples, action):
+        t0 = time.perf_counter()
+        await asyncio.wait_for(action, timeout)
+        samples.append(time.perf_counter() - t0)
+        if think:
+            await asyncio.sleep(think)
+
+    tab = None
+    try:
+        async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+            tab = BrowserTab(ws)
+
+            async def chat(step):
+                for turn in range(turns):
+                    prompt = f"Session {sid} step {step} turn {turn}: walk me through how my grade is computed."
+                    await timed(chats, tab.chat(prompt))
+
+            await timed(load, tab.rerun())
+
+            # Predict Exam Score
+            for term in ("pp", "pm", "pf"):
+                tab.set(f"{term}_cs", double_value=80.0)
+                await timed(reruns, tab.rerun())
+                await timed(reruns, tab.click(f"btn_{term}"))
+            await chat("predict")
+
+            # Calculate Grade
+            await timed(reruns, tab.click("nav_Calculate Grade"))
+            for key in ("btn_og_p", "btn_og_m", "btn_og_f"):
+                await timed(reruns, tab.click(key))
+            await chat("grade")
+
+            # Class Standing
+            await timed(reruns, tab.click("nav_Class Standing"))
+            tab.set("chk_quiz", bool_value=True)
+            await timed(reruns, tab.rerun())
+            tab.set("quiz_count", int_value=5)
+            await timed(reruns, tab.rerun())
+            await timed(reruns, tab.click("label:Finalize & Show Grade Equivalent →"))
+            await chat("standing")
+    except Exception as exc:
+        errors.append(f"{type(exc).__name__}: {exc}")
+    if tab is not None:
+        errors = tab.errors + errors
+    return load, reruns, chats, errors
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, log_path, timeout=60):
+    """``streamlit run`` the app on ``port`` and wait until it answers its health check."""
+    with open(log_path, "ab") as log:
+        proc = subprocess.Popen([sys.executable, "-m", "streamlit", "run", APP, "--server.headless=true",
+                                 f"--server.port={port}", "--server.fileWatcherType=none",
+                                 "--browser.gatherUsageStats=false"], stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"streamlit exited with {proc.returncode}; see {log_path}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"streamlit did not start within {timeout}s; see {log_path}")
+
+
+async def _server_level(url, n, turns, think, timeout):
+    return await asyncio.gather(*(walk_server_session(url, f"{n}-{i}", turns, think, timeout) for i in range(n)))
+
+
+def run_server_level(server, url, n, turns, think, timeout, log_path):
+    offset  = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+    sampler = MemorySampler(lambda: rss_bytes(server.pid))
+    sampler.start()
+    t0      = time.perf_counter()
+    results = asyncio.run(_server_level(url, n, turns, think, timeout))
+    wall    = time.perf_counter() - t0
+    return summarize(n, results, wall, sampler.stop(), log_path, offset)
+
+
+# ── One simulated student: an AppTest session in its own process ───────────────
+def run_session(sid, turns, think, timeout, start, results):
+    """Worker process: wait for the common start, walk the app, send back the samples."""
+    from streamlit.testing.v1 import AppTest
+
+    load, reruns, chats, errors = [], [], [], []
+    at = AppTest.from_file(APP, default_timeout=timeout)
+
+    def timed(samples, action):
+        t0 = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - t0)
+        if at.exception:
+            errors.append(at.exception[0].value)
+        if think:
+            time.sleep(think)
+
+    def chat(step):
+        for turn in range(turns):
+            prompt = f"Session {sid} step {step} turn {turn}: walk me through how my grade is computed."
+            timed(chats, lambda: at.chat_input[0].set_value(prompt).run())
+
+    start.wait()
+    try:
+        timed(load, at.run)
+
+        # Predict Exam Score
+        for term in ("pp", "pm", "pf"):
+            timed(reruns, lambda: at.number_input(key=f"{term}_cs").set_value(80.0).run())
+            timed(reruns, lambda: at.button(key=f"btn_{term}").click().run())
+        chat("predict")
+
+        # Calculate Grade
+        timed(reruns, lambda: at.button(key="nav_Calculate Grade").click().run())
+        for key in ("btn_og_p", "btn_og_m", "btn_og_f"):
+            timed(reruns, lambda: at.button(key=key).click().run())
+        chat("grade")
+
+        # Class Standing
+        timed(reruns, lambda: at.button(key="nav_Class Standing").click().run())
+        timed(reruns, lambda: at.checkbox(key="chk_quiz").check().run())
+        timed(reruns, lambda: at.number_input(key="quiz_count").set_value(5).run())
+        timed(reruns, lambda: next(b for b in at.button if b.label.startswith("Finalize")).click().run())
+        chat("standing")
+    except Exception as exc:
+        errors.append(f"{type(exc).__name__}: {exc}")
+    results.put((load, reruns, chats, [str(e) for e in errors]))
+
+
+# ── Levels ─────────────────────────────────────────────────────────────────────
+def read_ttft(log_path, offset):
+    """TTFT of every streamed chat turn logged after byte ``offset``."""
+    ttft = []
+    if not os.path.exists(log_path):
+        return ttft
+    with open(log_path, encoding="utf-8") as f:
+        f.seek(offset)
+        for line in f:
+            chat = json.loads(line).get("chat")
+            if chat and chat["ttft"] is not None:
+                ttft.append(chat["ttft"])
+    return ttft
+
+
+def percentiles(samples):
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "n": 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "n": len(samples)}
+
+
+def run_level(n, turns, think, timeout, log_path):
+    """Per-process driver: one AppTest session per worker process."""
+    ctx     = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    offset  = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+    start   = ctx.Event()
+    queue   = ctx.Queue()
+    workers = [ctx.Process(target=run_session, args=(f"{n}-{i}", turns, think, timeout, start, queue))
+               for i in range(n)]
+    for w in workers:
+        w.start()
+    pids    = [w.pid for w in workers]
+    sampler = MemorySampler(lambda: rss_bytes() + sum(private_bytes(pid) for pid in pids))
+    sampler.start()
+    t0 = time.perf_counter()
+    start.set()
+    results = [queue.get() for _ in workers]
+    wall = time.perf_counter() - t0
+    peak = sampler.stop()
+    for w in workers:
+        w.join()
+    return summarize(n, results, wall, peak, log_path, offset)
+
+
+def summarize(n, results, wall, peak, log_path, offset):
+    load, reruns, chats, errors = ([s for r in results for s in r[i]] for i in range(4))
+    return {
+        "sessions":    n,
+        "wall":        wall,
+        "load":        percentiles(load),
+        "rerun":       percentiles(reruns),
+        "chat":        percentiles(chats),
+        "ttft":        percentiles(read_ttft(log_path, offset)),
+        "peak_memory": peak,
+        "errors":      len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def report(levels, driver="server"):
+    def ms(x):
+        return "      -" if x is None else f"{x * 1000:7.1f}"
+    lines = [f"driver: {DRIVERS[driver]}",
+             f"{'sessions':>8} │ {'load ms p50':>11} │ {'rerun ms p50':>12} {'p95':>7} {'p99':>7} │ "
+             f"{'chat ms p50':>11} {'p95':>7} │ {'TTFT ms p50':>11} {'p95':>7} {'p99':>7} │ {'peak mem':>9} │ errors"]
+    for lv in levels:
+        r, c, t = lv["rerun"], lv["chat"], lv["ttft"]
+        lines.append(f"{lv['sessions']:>8} │ {ms(lv['load']['p50']):>11} │ {ms(r['p50']):>12} {ms(r['p95'])} {ms(r['p99'])} │ "
+                     f"{ms(c['p50']):>11} {ms(c['p95'])} │ {ms(t['p50']):>11} {ms(t['p95'])} {ms(t['p99'])} │ "
+                     f"{lv['peak_memory'] / 2**20:6.0f} MB │ {lv['errors']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=list(LEVELS), help="concurrency levels (default: %(default)s)")
+    parser.add_argument("--turns", type=int, default=1, help="chat prompts per mode per session (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM seconds between tokens (default: %(default)s)")
+    parser.add_argument("--think", type=float, default=0.0, help="pause after every interaction, in seconds (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun AppTest timeout (default: %(default)s)")
+    parser.add_argument("--driver", choices=list(DRIVERS), default="server",
+                        help="server: one streamlit server under load (default); apptest: per-process sessions")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    import fake_llm
+
+    if args.driver == "server":
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            raise RuntimeError("The server driver needs websockets installed; use --driver apptest without it.")
+
+    server  = fake_llm.serve(latency=args.latency)
+    workdir = tempfile.mkdtemp(prefix="grade-loadtest-")
+    log     = os.path.join(workdir, "metrics.jsonl")
+    # Inherited by the session processes, which import the app afterwards.
+    os.environ.update({
+        "GROQ_API_KEY":            "loadtest",
+        "GROQ_BASE_URL":           server.base_url,
+        "GRADE_PROFILE":           "1",
+        "GRADE_METRICS_DIR":       workdir,
+        "GRADE_METRICS_LOG":       log,
+        "GRADE_METRICS_PROM":      os.path.join(workdir, "metrics.prom"),
+        "GRADE_SESSION_SPILL_DIR": os.path.join(workdir, "sessions"),
+    })
+    # Import the heavy libraries once so forked sessions start warm. The app
+    # itself is not run here: its cached resources own threads a fork would not copy.
+    import pandas  # noqa: F401
+    import streamlit.testing.v1  # noqa: F401
+
+    levels, app = [], None
+    try:
+        if args.driver == "server":
+            port = free_port()
+            app  = start_server(port, os.path.join(workdir, "streamlit.log"))
+            url  = f"ws://127.0.0.1:{port}/_stcore/stream"
+        for n in args.sessions:
+            if app is not None:
+                levels.append(run_server_level(app, url, n, args.turns, args.think, args.timeout, log))
+            else:
+                levels.append(run_level(n, args.turns, args.think, args.timeout, log))
+            print(f"{n} sessions done in {levels[-1]['wall']:.1f}s", file=sys.stderr)
+    finally:
+        if app is not None:
+            app.terminate()
+            app.wait()
+        server.shutdown()
+
+    print(report(levels, args.driver))
+    for lv in levels:
+        if lv["first_error"]:
+            print(f"{lv['sessions']} sessions: {lv['errors']} errors, first: {lv['first_error']}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"driver": args.driver, "fake_llm_latency": args.latency, "turns": args.turns, "levels": levels},
+                      f, indent=2)
+    return 1 if any(lv["errors"] for lv in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Monte Carlo pass-probability estimates.
+
+A student is described by the six grading inputs (class standing and exam for
+each term). Inputs already known are fixed numbers; the rest are ``Dist``
+normals, clipped to 0-100 when sampled. Because the Final grade is linear in
+the six inputs (see planner.py), one simulation chunk is a single
+(draws × unknowns) normal sample, one matrix-vector product and one band
+lookup; chunks keep memory flat at any draw count.
+
+A recorded prelim_grade or midterm_grade (a finished term) is conditioned on
+rather than re-sampled: it enters the Final grade with its carry weight
+(prior_w² for the Prelim, prior_w for the Midterm) and replaces the inputs of
+that term and every earlier one, so only the later terms are simulated.
+
+Unknown inputs default to a normal fitted to the student's known scores of the
+same kind (exams to exams, class standings to class standings), shrunk toward
+``DEFAULT_DIST``; pass explicit ``Dist`` values to override. Every student gets
+its own child of one ``SeedSequence``, so a section's result depends only on
+the seed, not on the worker count.
+"""
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+import planner
+from grading import POLICY, band_index
+
+COMPONENTS    = tuple(f"{t}_{kind}" for t in planner.TERMS for kind in ("cs", "exam"))
+GRADES        = ("midterm_grade", "prelim_grade")     # latest finished term first
+DEFAULT_DRAWS = 100_000
+DEFAULT_CHUNK = 262_144
+PRIOR_WEIGHT  = 2           # pseudo-observations of DEFAULT_DIST when fitting
+
+
+class Dist(NamedTuple):
+    mean: float
+    sd:   float
+
+
+DEFAULT_DIST = Dist(80.0, 10.0)
+
+
+def fit(values, default=DEFAULT_DIST, prior_weight=PRIOR_WEIGHT):
+    """Normal fitted to known scores, shrunk toward ``default``."""
+    values = np.asarray([v for v in values if v is not None and not np.isnan(v)], dtype=float)
+    n = len(values)
+    if n == 0:
+        return default
+    mean = (values.sum() + prior_weight * default.mean) / (n + prior_weight)
+    var  = (((values - mean) ** 2).sum() + prior_weight * default.sd ** 2) / (n + prior_weight)
+    return Dist(float(mean), float(np.sqrt(var)))
+
+
+def _known(v):
+    return v is not None and not np.isnan(v)
+
+
+def student_inputs(known, dists=None):
+    """
+    Complete a mapping of known inputs (missing or NaN = unknown) into a
+    simulation input: unknowns become ``dists[component]`` or a fitted Dist.
+    A known prelim_grade / midterm_grade stands in for its term and the ones before.
+    """
+    dists  = dists or {}
+    grade  = next((g for g in GRADES if _known(known.get(g))), None)
+    done   = planner.TERMS[:planner.TERMS.index(grade.rsplit("_", 1)[0]) + 1] if grade else ()
+    values = {c: known.get(c) for c in COMPONENTS if c.rsplit("_", 1)[0] not in done}
+    values = {c: float(v) if _known(v) else None for c, v in values.items()}
+    # Scores of finished terms still inform the fit.
+    scores = {c: float(known[c]) for c in COMPONENTS if _known(known.get(c))}
+    fitted = {kind: fit([v for c, v in scores.items() if c.endswith(kind)]) for kind in ("cs", "exam")}
+    inputs = {c: v if v is not None else dists.get(c, fitted[c.rsplit("_", 1)[1]]) for c, v in values.items()}
+    if grade:
+        inputs[grade] = float(known[grade])
+    return inputs
+
+
+def weights(policy=None):
+    """Coefficient of each input (and of each finished term's grade) in the Final grade."""
+    policy = policy or POLICY
+    c, k   = planner.coefficients(policy)
+    w      = {f"{t}_{kind}": (c if kind == "cs" else k)[t] for t in planner.TERMS for kind in ("cs", "exam")}
+    return w | {"prelim_grade": policy.prior_w ** 2, "midterm_grade": policy.prior_w}
+
+
+def simulate(student, draws=DEFAULT_DRAWS, seed=None, policy=None, chunk=DEFAULT_CHUNK):
+    """Probability of each Final-grade band (failing band first) for one student."""
+    policy  = policy or POLICY
+    w       = weights(policy)
+    nb      = len(policy.points)
+    fixed   = sum(w[c] * v for c, v in student.items() if not isinstance(v, Dist))
+    uncertain = [(w[c], v) for c, v in student.items() if isinstance(v, Dist)]
+    counts  = np.zeros(nb, dtype=np.int64)
+    if not uncertain:
+        counts[int(band_index(fixed, policy))] = draws
+        return counts / draws
+
+    wt  = np.array([u[0] for u in uncertain])
+    mu  = np.array([u[1].mean for u in uncertain])
+    sd  = np.array([u[1].sd for u in uncertain])
+    rng = np.random.default_rng(seed)
+    done = 0
+    while done < draws:
+        m = min(chunk, draws - done)
+        z = rng.standard_normal((m, len(uncertain)))
+        z *= sd
+        z += mu
+        np.clip(z, 0.0, 100.0, out=z)
+        counts += np.bincount(band_index(fixed + z @ wt, policy), minlength=nb)
+        done += m
+    return counts / draws
+
+
+def _simulate_batch(students, seeds, draws, policy):
+    return np.array([simulate(s, draws, seed, policy) for s, seed in zip(students, seeds)])
+
+
+def simulate_section(students, draws=DEFAULT_DRAWS, seed=None, workers=1, policy=None, progress=None):
+    """
+    Band probabilities for every student, shape (students, bands); workers > 1
+    uses a process pool. ``progress(students)`` is called after every batch.
+    """
+    policy  = policy or POLICY
+    seeds   = np.random.SeedSequence(seed).spawn(len(students))
+    batches = max(workers * 4, -(-len(students) // 256)) if progress else workers * 4
+    bounds  = np.linspace(0, len(students), min(batches, len(students)) + 1).astype(int)
+    spans   = list(zip(bounds[:-1], bounds[1:]))
+    parts   = []
+    if workers <= 1 or len(students) < 2:
+        for a, b in spans:
+            parts.append(_simulate_batch(students[a:b], seeds[a:b], draws, policy))
+            if progress:
+                progress(b - a)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_simulate_batch, students[a:b], seeds[a:b], draws, policy) for a, b in spans]
+            for (a, b), fut in zip(spans, futures):
+                parts.append(fut.result())
+                if progress:
+                    progress(b - a)
+    return np.concatenate(parts).reshape(len(students), len(policy.points))
+
+
+def at_or_better(probs, point, policy=None):
+    """Probability of finishing at point grade ``point`` or better (e.g. 2.00), per student."""
+    policy = policy or POLICY
+    mask   = (policy.points <= point) & (np.arange(len(policy.points)) > 0)
+    return probs[..., mask].sum(axis=-1)
+
+
+def students_from_columns(columns, n=None, dists=None):
+    """Simulation inputs for each row of a column mapping (absent columns or NaN = unknown)."""
+    n    = n if n is not None else len(next(iter(columns.values())))
+    cols = COMPONENTS + GRADES
+    raw  = {c: np.asarray(columns[c], dtype=float) if c in columns else np.full(n, np.nan) for c in cols}
+    return [student_inputs({c: raw[c][i] for c in cols}, dists) for i in range(n)]
+
+
+# ── Background runs ────────────────────────────────────────────────────────────
+class SectionJob:
+    """A section simulation running on a background pool; ``done`` counts students finished."""
+
+    def __init__(self, total, params=None):
+        self.total  = total
+        self.params = params
+        self.done    = 0
+        self.future  = None
+        self.seconds = None     # wall time, set before the future completes
+        self._lock   = threading.Lock()
+
+    def advance(self, students):
+        with self._lock:
+            self.done += students
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else float(self.finished())
+
+    def finished(self):
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        """Band probabilities, shape (students, bands); re-raises the run's error."""
+        return self.future.result()
+
+
+def _run_section(job, columns, n, draws, seed, workers, policy):
+    t0 = time.perf_counter()
+    try:
+        return simulate_section(students_from_columns(columns, n), draws, seed, workers, policy, job.advance)
+    finally:
+        job.seconds = time.perf_counter() - t0
+
+
+def submit_section(pool, columns, n, draws=DEFAULT_DRAWS, seed=None, workers=1, policy=None, params=None):
+    """Simulate a section from its roster columns on ``pool`` (a thread pool); the caller polls the job."""
+    job = SectionJob(n, params)
+    job.future = pool.submit(_run_section, job, columns, n, draws, seed, workers, policy)
+    return job
@@ -0,0 +1,71 @@
+"""Whole-semester target planner.
+
+The term grades are chained (Midterm and Final carry ``prior_w`` of the term
+before), so the Final grade is linear in all six inputs:
+
+    final = Σ_t  c_t·cs_t + k_t·exam_t
+    k_final = partial_w·exam_w,  k_midterm = prior_w·k_final,  k_prelim = prior_w²·exam_w
+
+(and likewise c_t with cs_w). Given a Final-grade target, the known class
+standings and any exam scores already taken, the exams still to come satisfy
+one linear constraint. ``plan`` solves it in closed form: the balanced plan
+(the same score on every remaining exam) and, over a grid of scores for all
+but the last remaining exam, the minimum needed on the last — one broadcast.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from grading import POLICY
+
+TERMS     = ("prelim", "midterm", "final")
+EXAM_GRID = np.arange(50.0, 100.1, 5.0)
+
+
+def coefficients(policy=None):
+    """Per-term weight of the class standing and of the exam in the Final grade."""
+    policy = policy or POLICY
+    carry  = {"prelim": policy.prior_w ** 2, "midterm": policy.prior_w * policy.partial_w, "final": policy.partial_w}
+    return ({t: carry[t] * policy.cs_w for t in TERMS},
+            {t: carry[t] * policy.exam_w for t in TERMS})
+
+
+def term_grades(cs, exams, policy=None):
+    """Prelim, Midterm and Final grades for the given class standings and exam scores."""
+    policy = policy or POLICY
+    grades, prior = {}, None
+    for t in TERMS:
+        partial   = policy.cs_w * np.asarray(cs[t], dtype=float) + policy.exam_w * np.asarray(exams[t], dtype=float)
+        grades[t] = partial if prior is None else policy.partial_w * partial + policy.prior_w * prior
+        prior     = grades[t]
+    return grades
+
+
+class Plan(NamedTuple):
+    remaining: tuple            # terms whose exam is still to come, in order
+    current:   float            # Final grade with zero on every remaining exam
+    balanced:  float            # same score on every remaining exam (nan if none remain)
+    grid:      np.ndarray       # scores tried for each remaining exam but the last
+    needed:    np.ndarray       # last remaining exam needed, one axis per grid exam
+
+
+def plan(target, cs, exams, policy=None, grid=EXAM_GRID):
+    """
+    ``cs`` maps every term to its class standing; ``exams`` maps a term to its
+    exam score, or None when that exam is still to come.
+    """
+    c, k      = coefficients(policy)
+    remaining = tuple(t for t in TERMS if exams.get(t) is None)
+    current   = sum(c[t] * cs[t] for t in TERMS) + sum(k[t] * exams[t] for t in TERMS if t not in remaining)
+    gap       = target - current
+    if not remaining:
+        return Plan(remaining, current, np.nan, grid, np.empty(0))
+
+    balanced = gap / sum(k[t] for t in remaining)
+    *free, last = remaining
+    needed = np.asarray(gap, dtype=float)
+    for axis, t in enumerate(free):
+        shape = [1] * len(free)
+        shape[axis] = len(grid)
+        needed = needed - k[t] * grid.reshape(shape)
+    return Plan(remaining, current, balanced, grid, needed / k[last])
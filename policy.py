@@ -0,0 +1,159 @@
+"""Pluggable grading policies.
+
+A policy file (JSON, or YAML when PyYAML is installed) lists the passing
+bands, the failing grade and the term weights:
+
+    weights.cs / weights.exam       partial = cs*cs_w + exam*exam_w   (Prelim = partial)
+    weights.partial / weights.prior Midterm/Final = partial*partial_w + prior*prior_w
+
+Weights may be written as fractions ("2/3"). An optional ``rounding`` entry
+({"decimals": 2, "mode": "half_up" | "half_even" | "down"}) is the rule the
+exact arithmetic mode applies once to each term grade. ``compile_policy`` turns the file
+into sorted boundary arrays once, so band lookups are a binary search, and the
+LLM prompt text is rendered from the same object. Point ``GRADE_POLICY`` at a
+file to switch campuses; policies/default.json is used otherwise.
+"""
+import json
+import os
+import textwrap
+from dataclasses import dataclass, field
+from fractions import Fraction
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # YAML policies are optional
+    yaml = None
+
+ROUNDING_MODES      = ("half_up", "half_even", "down")
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policies", "default.json")
+
+
+@dataclass(frozen=True, eq=False)
+class GradingPolicy:
+    name:         str
+    cutoffs:      np.ndarray     # lower bound of each passing band, ascending
+    points:       np.ndarray     # index 0 = failing grade, then one per cutoff
+    descriptors:  np.ndarray
+    max_pct:      float
+    fail_pct:     float          # percentage a failing point grade converts to
+    weights:      dict           # name → exact Fraction
+    decimals:     int            # term-grade precision in exact mode
+    rounding:     str            # half_up | half_even | down
+    cs_w:         float = field(init=False)
+    exam_w:       float = field(init=False)
+    partial_w:    float = field(init=False)
+    prior_w:      float = field(init=False)
+
+    def __post_init__(self):
+        for name in ("cs", "exam", "partial", "prior"):
+            object.__setattr__(self, f"{name}_w", float(self.weights[name]))
+
+    @property
+    def point_to_pct(self):
+        """Point grade → minimum percentage, best grade first."""
+        table = {float(p): float(c) for p, c in zip(self.points[:0:-1], self.cutoffs[::-1])}
+        table[float(self.points[0])] = self.fail_pct
+        return table
+
+    @property
+    def pass_pct(self):
+        """Lowest passing percentage."""
+        return float(self.cutoffs[0])
+
+    def weight_labels(self):
+        """Display form of each weight, e.g. {"cs": "0.5", "partial": "(2/3)", …}."""
+        return {name: _weight(frac) for name, frac in self.weights.items()}
+
+    # ── Prompt text ──────────────────────────────────────────────────────────
+    def grading_text(self):
+        """
+        The GRADING line of the system prompt, e.g. "99-100→1.00 Excellent,
+        96 to <99→1.25 Superior, …". Bands are half-open (≥ own minimum, < the
+        next one), so cutoffs like 74.5 print correctly; the top band includes max_pct.
+        """
+        parts = [f"{_num(lo)} to <{_num(hi)}→{p:.2f} {d}"
+                 for lo, hi, p, d in zip(self.cutoffs, self.cutoffs[1:], self.points[1:], self.descriptors[1:])]
+        parts.append(f"{_num(self.cutoffs[-1])}-{_num(self.max_pct)}→{self.points[-1]:.2f} {self.descriptors[-1]}")
+        parts.reverse()
+        parts.append(f"<{_num(self.cutoffs[0])}→{self.points[0]:.2f} {self.descriptors[0]}")
+        return textwrap.fill("GRADING: " + ", ".join(parts), width=84, subsequent_indent="  ")
+
+    def formula_text(self):
+        """Formula section of the system prompt, rendered with this policy's weights."""
+        w = self.weight_labels()
+        cs, ex, pa, pr = w["cs"], w["exam"], w["partial"], w["prior"]
+        partial = f"{cs}*cs + {ex}*exam"
+        return f"""PREDICT MAJOR EXAM GRADE:
+  Prelim:   final = {partial}  → exam = (desired - {cs}*cs) / {ex}
+  Midterm:  final = {pa}*({partial}) + {pr}*prelim_grade
+            partial_needed = (desired - {pr}*prelim) / {pa}
+            exam = (partial_needed - {cs}*cs) / {ex}
+  Final:    final = {pa}*({partial}) + {pr}*midterm_grade
+            partial_needed = (desired - {pr}*midterm) / {pa}
+            exam = (partial_needed - {cs}*cs) / {ex}
+
+CALCULATE OVERALL GRADE:
+  Prelim  = {partial}
+  Midterm = {pa}*({partial}) + {pr}*prelim_grade
+  Final   = {pa}*({partial}) + {pr}*midterm_grade"""
+
+
+def _num(x):
+    return f"{float(x):.2f}".rstrip("0").rstrip(".")
+
+
+def _weight(frac):
+    """0.5 for 1/2, (2/3) for fractions without a short decimal form."""
+    if (frac * 100).denominator == 1:
+        return _num(frac)
+    return f"({frac.numerator}/{frac.denominator})"
+
+
+def compile_policy(spec):
+    """Validate a policy mapping and compile it into lookup arrays."""
+    try:
+        bands   = sorted(spec["bands"], key=lambda b: float(b["min"]))
+        fail    = spec["fail"]
+        weights = {k: Fraction(str(spec["weights"][k])) for k in ("cs", "exam", "partial", "prior")}
+        rule    = spec.get("rounding", {})
+        decimals, rounding = int(rule.get("decimals", 2)), rule.get("mode", "half_up")
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid grading policy: {exc}") from exc
+    if not bands:
+        raise ValueError("Invalid grading policy: no passing bands")
+    cutoffs = np.array([float(b["min"]) for b in bands])
+    if np.any(np.diff(cutoffs) <= 0):
+        raise ValueError("Invalid grading policy: band minimums must be distinct")
+    max_pct = float(spec.get("max_pct", 100))
+    if cutoffs[-1] > max_pct:
+        raise ValueError(f"Invalid grading policy: band minimum {_num(cutoffs[-1])} is above max_pct {_num(max_pct)}")
+    if weights["cs"] + weights["exam"] != 1 or weights["partial"] + weights["prior"] != 1:
+        raise ValueError("Invalid grading policy: each weight pair must sum to 1")
+    if decimals not in (0, 1, 2) or rounding not in ROUNDING_MODES:
+        raise ValueError(f"Invalid grading policy: rounding must keep 0-2 decimals with one of {', '.join(ROUNDING_MODES)}")
+    return GradingPolicy(
+        name        = spec.get("name", "custom"),
+        cutoffs     = cutoffs,
+        points      = np.array([float(fail["points"])] + [float(b["points"]) for b in bands]),
+        descriptors = np.array([fail["label"]] + [b["label"] for b in bands]),
+        max_pct     = max_pct,
+        fail_pct    = float(fail.get("pct", cutoffs[0] - 1)),
+        weights     = weights,
+        decimals    = decimals,
+        rounding    = rounding,
+    )
+
+
+def load_policy(path=None):
+    """Load and compile a JSON/YAML policy file (default: policies/default.json)."""
+    path = path or DEFAULT_POLICY_PATH
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("YAML grading policies need PyYAML installed.")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    return compile_policy(spec)
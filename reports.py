@@ -0,0 +1,346 @@
+"""Printable grade reports for a whole section.
+
+    section workbook   XLSX with a Summary sheet (band counts, pass rate and
+                       mean grade per term) and a Students sheet, one graded
+                       row per student
+    grade sheets       ZIP of one-page PDF grade sheets, one per student
+
+Both are built from a roster file chunk by chunk (roster.iter_chunks →
+grade_chunk) and streamed to disk: the workbook is written in openpyxl's
+write-only mode, and every PDF is rendered on its own and added to the archive
+before the next, so memory stays flat at any section size. PDF rendering is
+the slow part; ``workers > 1`` renders chunks in a process pool, keeping a
+bounded window in flight like roster.map_chunks.
+
+``submit`` runs an export on a caller-owned thread pool and returns an
+``ExportJob`` whose row counters drive a progress bar. ``new_workdir`` hands
+out a job directory under ``EXPORT_DIR`` and deletes ones untouched for
+``ttl`` seconds, so finished exports do not pile up on disk; ``keep_alive``
+refreshes a directory that is still offered for download.
+
+openpyxl (XLSX) and reportlab (PDF) are optional.
+"""
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+import roster
+from grading import POLICY
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX reports are optional
+    Workbook = None
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+except ImportError:  # PDF reports are optional
+    canvas = None
+
+ID_COLUMNS    = ("student_id", "student", "id", "name")
+DEFAULT_CHUNK = 1_000
+DEFAULT_TTL   = 3600
+EXPORT_DIR    = os.environ.get("GRADE_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "grade-reports"))
+
+
+def xlsx_available():
+    return Workbook is not None
+
+
+def pdf_available():
+    return canvas is not None
+
+
+def count_rows(src, fmt="csv"):
+    """Data rows in a roster file without parsing it (CSV: line count less the header)."""
+    if fmt == "parquet":
+        if roster.pq is None:
+            raise RuntimeError("Parquet rosters need pyarrow installed.")
+        return roster.pq.ParquetFile(src).metadata.num_rows
+    lines, last = 0, b"\n"
+    with open(src, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last   = block[-1:]
+    return max(lines + (last != b"\n") - 1, 0)
+
+
+def id_column(columns):
+    return next((c for c in ID_COLUMNS if c in columns), None)
+
+
+def graded_terms(columns):
+    return [t for t in roster.TERMS if f"{t}_grade" in columns]
+
+
+def _clean(value):
+    """Cell value for openpyxl: NaN → empty, NumPy scalars → Python."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    return None if isinstance(value, float) and value != value else value
+
+
+# ── Section workbook ───────────────────────────────────────────────────────────
+class SectionSummary:
+    """Running band counts and grade sums per term over graded chunks."""
+
+    def __init__(self, policy=None):
+        self.policy = policy or POLICY
+        self.band   = {p: i for i, p in enumerate(self.policy.points)}
+        self.rows   = 0
+        self.terms  = {}        # term → [graded, grade sum, passed, band counts]
+
+    def add(self, df):
+        self.rows += len(df)
+        for term in graded_terms(df.columns):
+            grades = df[f"{term}_grade"].to_numpy(dtype=float)
+            ok     = ~np.isnan(grades)
+            idx    = df[f"{term}_points"][ok].map(self.band).to_numpy(dtype=int)
+            acc    = self.terms.setdefault(term, [0, 0.0, 0, np.zeros(len(self.policy.points), dtype=np.int64)])
+            acc[0] += int(ok.sum())
+            acc[1] += float(grades[ok].sum())
+            acc[2] += int((idx > 0).sum())
+            acc[3] += np.bincount(idx, minlength=len(self.policy.points))
+
+    def table(self):
+        """Summary sheet rows: one column per graded term."""
+        terms = list(self.terms)
+        rows  = [["Students", self.rows], [], ["", *(t.capitalize() for t in terms)]]
+        rows.append(["Graded",     *(self.terms[t][0] for t in terms)])
+        rows.append(["Passed",     *(self.terms[t][2] for t in terms)])
+        rows.append(["Pass rate",  *(round(self.terms[t][2] / self.terms[t][0], 4) if self.terms[t][0] else None
+                                     for t in terms)])
+        rows.append(["Mean grade", *(round(self.terms[t][1] / self.terms[t][0], 2) if self.terms[t][0] else None
+                                     for t in terms)])
+        rows.append([])
+        for i in range(len(self.policy.points) - 1, -1, -1):
+            label = f"{self.policy.points[i]:.2f} {self.policy.descriptors[i]}"
+            rows.append([label, *(int(self.terms[t][3][i]) for t in terms)])
+        return rows
+
+
+def write_section_xlsx(chunks, dst, progress=None, section=""):
+    """
+    Write graded chunks to an XLSX workbook at ``dst`` as they arrive.
+    ``progress(rows)`` is called after every chunk. Returns the row count.
+    """
+    if Workbook is None:
+        raise RuntimeError("XLSX reports need openpyxl installed.")
+    wb       = Workbook(write_only=True)
+    summary  = wb.create_sheet("Summary")      # first tab, filled once every row is counted
+    students = wb.create_sheet("Students")
+    totals   = SectionSummary()
+    for i, df in enumerate(chunks):
+        if i == 0:
+            students.append(list(df.columns))
+        for row in df.itertuples(index=False, name=None):
+            students.append([_clean(v) for v in row])
+        totals.add(df)
+        if progress:
+            progress(len(df))
+    if section:
+        summary.append(["Section", section])
+    for row in totals.table():
+        summary.append(row)
+    wb.save(dst)
+    return totals.rows
+
+
+# ── Student grade sheets ───────────────────────────────────────────────────────
+SHEET_COLUMNS = (("Term", 72), ("Class Standing", 150), ("Exam", 250), ("Grade", 310), ("Points", 380), ("Remarks", 440))
+
+
+def _fmt(value, spec):
+    if isinstance(value, str):  # non-numeric roster cell, printed as entered
+        return value
+    return "—" if value is None or value != value else format(value, spec)
+
+
+def grade_sheet_pdf(record, label, section="", policy=None):
+    """One student's grade sheet as PDF bytes; ``record`` is a graded roster row as a dict."""
+    if canvas is None:
+        raise RuntimeError("PDF reports need reportlab installed.")
+    policy = policy or POLICY
+    buf    = io.BytesIO()
+    c      = canvas.Canvas(buf, pagesize=A4, invariant=1)
+    width, height = A4
+    c.setTitle(f"Grade Sheet — {label}")
+
+    y = height - 72
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(72, y, "Grade Sheet")
+    y -= 24
+    c.setFont("Helvetica", 11)
+    c.drawString(72, y, f"Student: {label}")
+    if section:
+        c.drawRightString(width - 72, y, f"Section: {section}")
+
+    y -= 40
+    c.setFont("Helvetica-Bold", 10)
+    for text, x in SHEET_COLUMNS:
+        c.drawString(x, y, text)
+    c.line(72, y - 6, width - 72, y - 6)
+    c.setFont("Helvetica", 10)
+    for term, (cs_col, exam_col, _) in roster.TERMS.items():
+        if f"{term}_grade" not in record:
+            continue
+        y -= 22
+        grade = record[f"{term}_grade"]
+        cells = (term.capitalize(), _fmt(record.get(cs_col), ".2f"), _fmt(record.get(exam_col), ".2f"),
+                 _fmt(grade, ".2f") + ("%" if grade == grade else ""),
+                 _fmt(record[f"{term}_points"], ".2f") if grade == grade else "—",
+                 record[f"{term}_descriptor"] if grade == grade else "Incomplete")
+        for text, (_, x) in zip(cells, SHEET_COLUMNS):
+            c.drawString(x, y, str(text))
+
+    c.setFont("Helvetica", 8)
+    c.drawString(72, 48, f"{policy.name} grading policy; {policy.pass_pct:g}% and above passes.")
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _safe_name(label):
+    return re.sub(r"[^\w.-]+", "_", str(label)).strip("_") or "student"
+
+
+def _render_chunk(df, start, section=""):
+    """(archive name, PDF bytes) for every row of a graded chunk; ``start`` numbers unlabeled rows."""
+    key, out = id_column(df.columns), []
+    for i, record in enumerate(df.to_dict("records")):
+        label = record[key] if key else f"Row {start + i + 1}"
+        out.append((f"{start + i + 1:06d}_{_safe_name(label)}.pdf", grade_sheet_pdf(record, label, section)))
+    return out
+
+
+def _rendered(chunks, workers, section):
+    """Rendered chunks in input order; workers > 1 renders in a process pool."""
+    start = 0
+    if workers <= 1:
+        for df in chunks:
+            yield len(df), _render_chunk(df, start, section)
+            start += len(df)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for df in chunks:
+            pending.append((len(df), pool.submit(_render_chunk, df, start, section)))
+            start += len(df)
+            if len(pending) >= 2 * workers:
+                n, fut = pending.popleft()
+                yield n, fut.result()
+        while pending:
+            n, fut = pending.popleft()
+            yield n, fut.result()
+
+
+def write_student_pdfs(chunks, dst, progress=None, section="", workers=1):
+    """
+    Write one PDF grade sheet per student into a ZIP archive at ``dst``.
+    ``progress(rows)`` is called after every chunk. Returns the row count.
+    """
+    if canvas is None:
+        raise RuntimeError("PDF reports need reportlab installed.")
+    rows = 0
+    # PDFs are already compressed, so the archive only stores them.
+    with zipfile.ZipFile(dst, "w", zipfile.ZIP_STORED) as zf:
+        for n, sheets in _rendered(chunks, workers, section):
+            for name, data in sheets:
+                zf.writestr(name, data)
+            rows += n
+            if progress:
+                progress(n)
+    return rows
+
+
+# ── Background exports ─────────────────────────────────────────────────────────
+EXPORTS = {
+    "xlsx": (write_section_xlsx, "section workbook", ".xlsx"),
+    "pdf":  (write_student_pdfs, "grade sheets",     ".zip"),
+}
+
+
+class ExportJob:
+    """One export running on a background pool; ``done`` counts rows written."""
+
+    def __init__(self, kind, path, total, params=None):
+        self.kind   = kind
+        self.path   = path
+        self.total  = total
+        self.params = params
+        self.done   = 0
+        self.future = None
+        self._lock  = threading.Lock()
+
+    def advance(self, rows):
+        with self._lock:
+            self.done += rows
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else float(self.finished())
+
+    def finished(self):
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        """Rows exported; re-raises the export's error."""
+        return self.future.result()
+
+
+def export(kind, src, dst, fmt="csv", progress=None, section="", workers=1, chunksize=DEFAULT_CHUNK, exact=None):
+    """Grade the roster at ``src`` and write a ``kind`` report ("xlsx" or "pdf") to ``dst``."""
+    write  = EXPORTS[kind][0]
+    grade  = partial(roster.grade_chunk, exact=exact)
+    chunks = map(grade, roster.iter_chunks(src, fmt, chunksize))
+    kwargs = {"workers": workers} if kind == "pdf" else {}
+    return write(chunks, dst, progress, section, **kwargs)
+
+
+def submit(pool, kind, src, dst, fmt="csv", section="", workers=1, exact=None, params=None):
+    """
+    Start an export on ``pool`` (a thread pool); the caller polls the returned
+    job. ``params`` is kept on the job to tell which input it belongs to.
+    """
+    job = ExportJob(kind, dst, count_rows(src, fmt), params)
+    job.future = pool.submit(export, kind, src, dst, fmt, job.advance, section, workers, exact=exact)
+    return job
+
+
+def new_workdir(root=EXPORT_DIR, ttl=DEFAULT_TTL):
+    """A fresh directory for one export job; job directories untouched for ``ttl`` seconds are removed."""
+    os.makedirs(root, exist_ok=True)
+    cutoff = time.time() - ttl
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    return tempfile.mkdtemp(prefix="job-", dir=root)
+
+
+def keep_alive(workdir):
+    """Mark a job directory as in use so ``new_workdir`` does not expire it."""
+    try:
+        os.utime(workdir)
+    except FileNotFoundError:
+        pass
+
+
+def read_output(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def output_name(kind, source_name):
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    return f"{stem}_{EXPORTS[kind][1].replace(' ', '_')}{EXPORTS[kind][2]}"
@@ -0,0 +1,243 @@
+"""Per-session state with a bounded process footprint.
+
+The heavy parts of a browser session — the chat history, the class-standing
+item arrays, a loaded analytics roster and its last pass-probability
+simulation — live in a ``SessionData`` owned by
+one process-wide ``SessionManager`` instead of in ``st.session_state``, which
+Streamlit keeps in memory until the tab closes. The manager
+
+  - stores chat history compactly (``ChatLog``: one UTF-8 buffer plus offsets,
+    capped at ``max_messages``),
+  - measures the bytes each session holds after every run,
+  - spills sessions idle past ``idle_seconds`` to a zlib-compressed pickle in
+    ``spill_dir`` and reloads them transparently on the next run, and
+  - spills least-recently-used sessions (idle at least ``min_idle`` seconds)
+    while the resident total exceeds ``max_bytes``.
+
+A run holds its session with ``acquire`` … ``release``; a session with a run in
+progress (a long chat stream, say) is pinned and never spilled, so nothing it
+writes lands in an orphaned copy.
+
+Spill files untouched for ``spill_ttl`` seconds are deleted.
+
+Environment: GRADE_SESSION_IDLE, GRADE_SESSION_MAX_MB, GRADE_SESSION_SPILL_DIR,
+GRADE_CHAT_MAX_MESSAGES.
+"""
+import os
+import pickle
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+import numpy as np
+
+DEFAULT_IDLE_SECONDS = 15 * 60
+DEFAULT_MIN_IDLE     = 30
+DEFAULT_MAX_BYTES    = 256 * 2**20
+DEFAULT_SPILL_TTL    = 24 * 3600
+DEFAULT_MAX_MESSAGES = 200
+DEFAULT_SPILL_DIR    = os.path.join(os.path.expanduser("~"), ".cache", "grade_calcu", "sessions")
+
+_ROLES = ("user", "assistant", "system")
+
+
+class ChatLog:
+    """Chat history as one UTF-8 buffer, end offsets and role codes; oldest messages drop past ``max_messages``."""
+
+    def __init__(self, max_messages=DEFAULT_MAX_MESSAGES):
+        self.max_messages = max_messages
+        self._blob  = bytearray()
+        self._ends  = array("I")
+        self._roles = bytearray()
+
+    def append(self, message):
+        self._blob.extend(message["content"].encode())
+        self._ends.append(len(self._blob))
+        self._roles.append(_ROLES.index(message["role"]))
+        if len(self._ends) > self.max_messages:
+            self._drop(len(self._ends) - self.max_messages)
+
+    def _drop(self, n):
+        cut = self._ends[n - 1]
+        self._blob  = self._blob[cut:]
+        self._ends  = array("I", (e - cut for e in self._ends[n:]))
+        self._roles = self._roles[n:]
+
+    def clear(self):
+        self.__init__(self.max_messages)
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        start = self._ends[i - 1] if i else 0
+        return {"role": _ROLES[self._roles[i]], "content": self._blob[start:self._ends[i]].decode()}
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self._blob) + sys.getsizeof(self._ends) + sys.getsizeof(self._roles)
+
+
+def sizeof(obj, _seen=None):
+    """Approximate deep size in bytes; NumPy arrays count their buffers."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        # getsizeof already includes the buffer of an array that owns its data.
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None else 0)
+    if isinstance(obj, ChatLog):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sizeof(k, seen) + sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(sizeof(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += sizeof(vars(obj), seen)
+    return size
+
+
+class SessionData:
+    """Everything heavy one browser session holds."""
+
+    def __init__(self, max_messages=DEFAULT_MAX_MESSAGES):
+        self.chat   = ChatLog(max_messages)
+        self.items  = {}        # category key → (scores, totals, CategoryAggregate)
+        self.roster = None      # (upload file_id, analytics.RosterModel)
+        self.simulation = None  # (params, band probabilities, seconds) of the last finished simulation
+
+    def nbytes(self):
+        return sizeof(self)
+
+
+class SessionManager:
+    def __init__(self, spill_dir=DEFAULT_SPILL_DIR, idle_seconds=DEFAULT_IDLE_SECONDS, max_bytes=DEFAULT_MAX_BYTES,
+                 min_idle=DEFAULT_MIN_IDLE, spill_ttl=DEFAULT_SPILL_TTL, max_messages=DEFAULT_MAX_MESSAGES):
+        self.spill_dir    = spill_dir
+        self.idle_seconds = idle_seconds
+        self.max_bytes    = max_bytes
+        self.min_idle     = min_idle
+        self.spill_ttl    = spill_ttl
+        self.max_messages = max_messages
+        self.spills       = 0
+        self.reloads      = 0
+        self._resident    = {}      # session id → SessionData
+        self._seen        = {}      # session id → last access (resident sessions)
+        self._bytes       = {}      # session id → bytes at the end of its last run
+        self._pins        = {}      # session id → runs in progress
+        self._spilled     = set()
+        self._expired_at  = 0.0
+        self._lock        = threading.Lock()
+        os.makedirs(spill_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            spill_dir    = os.environ.get("GRADE_SESSION_SPILL_DIR", DEFAULT_SPILL_DIR),
+            idle_seconds = float(os.environ.get("GRADE_SESSION_IDLE", DEFAULT_IDLE_SECONDS)),
+            max_bytes    = int(float(os.environ.get("GRADE_SESSION_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+            max_messages = int(os.environ.get("GRADE_CHAT_MAX_MESSAGES", DEFAULT_MAX_MESSAGES)),
+        )
+
+    def _spill_path(self, sid):
+        return os.path.join(self.spill_dir, f"{sid}.pkl.z")
+
+    def get(self, sid):
+        """The session's data, reloaded from disk if it was spilled."""
+        with self._lock:
+            return self._load(sid)
+
+    def acquire(self, sid):
+        """Start of a run: like ``get``, and pin the session until the matching ``release``."""
+        with self._lock:
+            self._pins[sid] = self._pins.get(sid, 0) + 1
+            return self._load(sid)
+
+    def _load(self, sid):
+        data = self._resident.get(sid)
+        if data is None:
+            data = self._reload(sid) or SessionData(self.max_messages)
+            self._resident[sid] = data
+        self._seen[sid] = time.monotonic()
+        return data
+
+    def _reload(self, sid):
+        path = self._spill_path(sid)
+        try:
+            with open(path, "rb") as f:
+                data = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            return None
+        os.remove(path)
+        self._spilled.discard(sid)
+        self.reloads += 1
+        return data
+
+    def release(self, sid):
+        """End of a run: unpin and re-measure the session, then spill idle or over-budget ones."""
+        with self._lock:
+            pins = self._pins.pop(sid, 0) - 1
+            if pins > 0:
+                self._pins[sid] = pins
+            if sid in self._seen:
+                self._seen[sid] = time.monotonic()
+        data = self._resident.get(sid)
+        if data is not None:
+            self._bytes[sid] = data.nbytes()
+        self.sweep()
+
+    def sweep(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            by_age = sorted(self._seen, key=self._seen.get)
+            total  = sum(self._bytes.get(s, 0) for s in by_age)
+            for sid in by_age:
+                if sid in self._pins:
+                    continue
+                idle = now - self._seen[sid]
+                if idle >= self.idle_seconds or (total > self.max_bytes and idle >= self.min_idle):
+                    total -= self._bytes.get(sid, 0)
+                    self._spill(sid)
+        self._expire_spills()
+
+    def _spill(self, sid):
+        data = self._resident.pop(sid)
+        del self._seen[sid]
+        self._bytes.pop(sid, None)
+        tmp = self._spill_path(sid) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL), 1))
+        os.replace(tmp, self._spill_path(sid))
+        self._spilled.add(sid)
+        self.spills += 1
+
+    def _expire_spills(self):
+        # At most once a minute; spill files from earlier processes are covered too.
+        if time.time() - self._expired_at < 60:
+            return
+        self._expired_at = time.time()
+        cutoff = self._expired_at - self.spill_ttl
+        for entry in os.scandir(self.spill_dir):
+            if entry.name.endswith(".pkl.z") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                self._spilled.discard(entry.name[:-len(".pkl.z")])
+
+    def session_bytes(self, sid):
+        return self._bytes.get(sid, 0)
+
+    def stats(self):
+        with self._lock:
+            sizes = list(self._bytes.values())
+        return {"resident": len(self._resident), "spilled": len(self._spilled), "bytes": sum(sizes),
+                "max_session_bytes": max(sizes, default=0), "spills": self.spills, "reloads": self.reloads}
@@ -0,0 +1,38 @@
+"""Tests for the local answer engine: the request's examples are answered
+locally, and ordinary questions that merely contain a number fall through to
+the LLM. Run with ``python -m pytest``.
+"""
+import pytest
+
+import chat_intents
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("what exam score for midterm 85 with cs 80 and prelim 78", "You need **97.0%** on the Midterm exam."),
+    ("my cs is 85, what do I need on the prelim exam to get 80", "You need **75.0%** on the Prelim exam."),
+    ("what's 2.25 in percent",                                   "starts at **84%**"),
+    ("what is 2.25 in %",                                        "starts at **84%**"),
+    ("convert 2.25 to percent",                                  "starts at **84%**"),
+    ("how many percent is 1.75",                                 "starts at **90%**"),
+    ("what is 5.00 in percent",                                  "anything below **75%**"),
+    ("what grade is 88%",                                        "is a **2.00 (Good)**"),
+    ("convert 88% to a point grade",                             "is a **2.00 (Good)**"),
+    ("what is the equivalent of 91%",                            "is a **1.75 (Very Good)**"),
+    ("if my cs is 90 and my prelim exam was 60 what's my prelim grade", "**75.00%** → **3.00 Passing**"),
+    ("cs 80, exam 90, prelim 85 - what is my midterm grade?",    "**85.00%** → **2.25 Very Satisfactory**"),
+])
+def test_answered_locally(prompt, expected):
+    reply = chat_intents.answer(prompt)
+    assert reply is not None and expected in reply
+
+
+@pytest.mark.parametrize("prompt", [
+    "what is 3 percent of my grade",
+    "what grade should I aim for if I got 80?",
+    "I scored 80 in the exam, is that good?",
+    "what is my prelim grade if I want 90 and cs is 80",
+    "how is the final grade computed?",
+    "hello",
+])
+def test_falls_through_to_the_llm(prompt):
+    assert chat_intents.answer(prompt) is None
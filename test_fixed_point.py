@@ -0,0 +1,98 @@
+"""Property tests for the exact fixed-point grading path.
+
+Random percentages with two decimals are graded under every rounding mode and
+precision and checked against a pure-Fraction reference, the float path and
+the band cutoffs. Run with ``python -m pytest``.
+"""
+import dataclasses
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import fixed_point
+from grading import POLICY, band_index, grade_roster
+
+N     = 2_000
+MODES = ("half_up", "half_even", "down")
+
+
+def reference_hundredths(cs, exam, prior, policy):
+    """Term grade from exact Fractions and the policy rounding rule, in hundredths."""
+    w     = policy.weights
+    grade = w["cs"] * Fraction(cs, 100) + w["exam"] * Fraction(exam, 100)
+    if prior is not None:
+        grade = w["partial"] * grade + w["prior"] * Fraction(prior, 100)
+    scaled = grade * 10 ** policy.decimals
+    if policy.rounding == "down":
+        rounded = math.floor(scaled)
+    elif policy.rounding == "half_even":
+        rounded = round(scaled)
+    else:
+        rounded = math.floor(scaled + Fraction(1, 2))
+    return int(rounded * 100 // 10 ** policy.decimals)
+
+
+@pytest.fixture(scope="module")
+def hundredths():
+    """Random inputs in hundredths of a percent, with the extremes up front."""
+    cs, exam, prior = np.random.default_rng(0).integers(0, 10_001, (3, N))
+    cs[:3], exam[:3], prior[:3] = 0, 10_000, 7_500
+    return cs, exam, prior
+
+
+CASES = [pytest.param(mode, decimals, chained, id=f"{mode}-{decimals}dp-{'chained' if chained else 'prelim'}")
+         for mode in MODES for decimals in (0, 2) for chained in (False, True)]
+
+
+@pytest.mark.parametrize("mode, decimals, chained", CASES)
+def test_matches_fraction_reference(hundredths, mode, decimals, chained):
+    cs, exam, prior = hundredths
+    policy = dataclasses.replace(POLICY, rounding=mode, decimals=decimals)
+    got    = fixed_point.term_hundredths(cs / 100, exam / 100, prior / 100 if chained else None, policy)
+    want   = [reference_hundredths(int(c), int(e), int(p) if chained else None, policy)
+              for c, e, p in zip(cs, exam, prior)]
+    np.testing.assert_array_equal(got, want)
+
+
+@pytest.mark.parametrize("mode, decimals, chained", CASES)
+def test_float_path_within_one_rounding_step(hundredths, mode, decimals, chained):
+    cs, exam, prior = hundredths
+    policy = dataclasses.replace(POLICY, rounding=mode, decimals=decimals)
+    p      = prior / 100 if chained else None
+    exact  = fixed_point.term_hundredths(cs / 100, exam / 100, p, policy) / 100
+    floats = grade_roster(cs / 100, exam / 100, p, policy, exact=False)[0]
+    # Rounding down can move a grade by a whole step; the half rules by half of one.
+    step   = 10 ** -decimals / (1 if mode == "down" else 2)
+    assert np.all(np.abs(floats - exact) <= step + 1e-9)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_grade_on_a_cutoff_lands_in_that_band(mode):
+    policy = dataclasses.replace(POLICY, rounding=mode)
+    on_cut = np.rint(policy.cutoffs * 100) / 100
+    _, points, _ = fixed_point.grade_roster(on_cut, on_cut, on_cut, policy)
+    np.testing.assert_array_equal(points, policy.points[1:])
+
+
+def test_just_below_a_cutoff_stays_in_the_band_below():
+    below = np.rint(POLICY.cutoffs * 100) / 100 - 0.01
+    idx   = fixed_point.band_index(fixed_point.term_hundredths(below, below, below, POLICY), POLICY)
+    np.testing.assert_array_equal(idx, np.arange(len(POLICY.cutoffs)))
+
+
+def test_exact_and_float_bands_agree_off_the_boundaries(hundredths):
+    # Away from a cutoff both paths must pick the same band.
+    cs, exam, prior = hundredths
+    exact  = fixed_point.term_hundredths(cs / 100, exam / 100, prior / 100, POLICY)
+    floats = grade_roster(cs / 100, exam / 100, prior / 100, exact=False)[0]
+    dist   = np.min(np.abs(exact[:, None] - np.rint(POLICY.cutoffs * 100)[None, :]), axis=1)
+    clear  = dist > 1
+    np.testing.assert_array_equal(band_index(floats[clear], POLICY), fixed_point.band_index(exact[clear], POLICY))
+
+
+def test_missing_inputs_give_nan_and_the_failing_band():
+    grades, points, _ = fixed_point.grade_roster(np.array([np.nan, 80.0]), np.array([90.0, np.nan]), None, POLICY)
+    assert np.isnan(grades).all()
+    assert (points == POLICY.points[0]).all()
@@ -0,0 +1,69 @@
+"""Tests for policy validation, the prompt's band text and how desired targets
+are read as point grades or percentages. Run with ``python -m pytest``.
+"""
+import json
+
+import pytest
+
+from grading import POLICY, is_point_grade, resolve_desired
+from policy import DEFAULT_POLICY_PATH, compile_policy
+
+
+@pytest.fixture
+def spec():
+    with open(DEFAULT_POLICY_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def four_point():
+    """A 4.00-best scale with a 0.00 failing grade."""
+    return compile_policy({
+        "name": "4-point", "max_pct": 100,
+        "bands": [{"min": m, "points": p, "label": f"P{p}"} for m, p in ((90, 4), (80, 3), (70, 2), (60, 1))],
+        "fail": {"points": 0, "label": "Failed", "pct": 59},
+        "weights": {"cs": "1/2", "exam": "1/2", "partial": "2/3", "prior": "1/3"},
+    })
+
+
+def test_cutoff_above_max_pct_is_rejected(spec):
+    spec["bands"][0]["min"] = 101
+    with pytest.raises(ValueError, match="above max_pct"):
+        compile_policy(spec)
+
+
+def test_cutoff_at_max_pct_is_allowed(spec):
+    spec["bands"][0]["min"] = 100
+    assert compile_policy(spec).cutoffs[-1] == 100
+
+
+def test_grading_text_bands_are_half_open(spec):
+    spec["bands"][-1]["min"] = 74.5
+    text = " ".join(compile_policy(spec).grading_text().split())
+    assert "74.5 to <78→3.00 Passing" in text
+    assert "99-100→1.00 Excellent" in text
+    assert "<74.5→5.00 Failed" in text
+
+
+def test_point_range_comes_from_the_policy(four_point):
+    assert is_point_grade(0.0, four_point) and is_point_grade(4.0, four_point)
+    assert not is_point_grade(4.5, four_point)
+    assert is_point_grade(4.5, POLICY)
+
+
+@pytest.mark.parametrize("val", [0.0, 0.5, 0.99])
+def test_values_below_the_default_scale_are_percentages(val):
+    assert resolve_desired(val) == (val, False, None)
+
+
+def test_resolve_desired_on_the_default_scale():
+    assert resolve_desired(1.0) == (99.0, True, 1.0)
+    assert resolve_desired(2.1) == (87.0, True, 2.0)
+    assert resolve_desired(5.0) == (74.0, True, 5.0)
+    assert resolve_desired(5.01) == (5.01, False, None)
+
+
+def test_resolve_desired_on_another_scale(four_point):
+    assert resolve_desired(3.0, four_point) == (80.0, True, 3.0)
+    assert resolve_desired(3.1, four_point) == (80.0, True, 3.0)
+    assert resolve_desired(85.0, four_point) == (85.0, False, None)